@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+UI dump分析脚本的公共部分：bounds解析、dump流式遍历、字体加载
+"""
+from PIL import Image, ImageFont
+import numpy as np
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    # 标准库ElementTree在CPython 3中已自动使用C实现（_elementtree），无需cElementTree
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+from functools import lru_cache
+from pathlib import Path
+import io
+import os
+from typing import NamedTuple, Tuple
+import re
+
+# 格式: "[x1,y1][x2,y2]"
+_BOUNDS_RE = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+# 多行拼接后逐行匹配：锚定行首，每行最多命中一次（与parse_bounds的match语义一致）
+_BOUNDS_LINE_RE = re.compile(r"^\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]", re.M)
+
+# 按钮/图片控件的完整类名，用集合查找代替endswith后缀判断
+_BUTTON_CLASSES = frozenset({
+    "android.widget.Button",
+    "android.widget.ImageButton",
+    "android.widget.RadioButton",
+    "android.widget.ToggleButton",
+    "androidx.appcompat.widget.AppCompatButton",
+    "androidx.appcompat.widget.AppCompatImageButton",
+    "androidx.appcompat.widget.AppCompatRadioButton",
+    "com.google.android.material.button.MaterialButton",
+    "com.google.android.material.floatingactionbutton.FloatingActionButton",
+})
+_IMAGE_CLASSES = frozenset({
+    "android.widget.ImageView",
+    "androidx.appcompat.widget.AppCompatImageView",
+})
+
+class ElemInfo(NamedTuple):
+    """分类命中的UI元素信息"""
+    bounds: Tuple[int, int, int, int]
+    center: Tuple[int, int]
+    size: Tuple[int, int]
+    class_name: str
+    content_desc: str
+    text: str
+    clickable: bool
+
+def make_elem_info(bounds, class_name, content_desc, text, clickable):
+    """为通过筛选的元素构造ElemInfo（中心点、尺寸只在此时计算）"""
+    x1, y1, x2, y2 = bounds
+    return ElemInfo(bounds, ((x1 + x2) // 2, (y1 + y2) // 2), (x2 - x1, y2 - y1),
+                    class_name, content_desc, text, clickable)
+
+def parse_bounds(bounds_str):
+    """解析bounds字符串为坐标元组"""
+    m = _BOUNDS_RE.match(bounds_str) if bounds_str else None
+    if not m:
+        return None
+    return (int(m[1]), int(m[2]), int(m[3]), int(m[4]))
+
+@lru_cache(maxsize=None)
+def _load_font(size):
+    """按字号加载字体，同一字号在进程内只读取一次字体文件"""
+    try:
+        return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size)
+    except OSError:
+        return ImageFont.load_default()
+
+@lru_cache(maxsize=4)
+def _decode_screenshot(path, mtime_ns, size):
+    """解码截图为RGBA（mtime/size参与缓存键，文件被覆盖后会重新解码）"""
+    img = Image.open(path)
+    # screencap输出通常已是RGBA，此时直接使用，避免convert再复制一份整图
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    img.load()
+    return img
+
+def _load_screenshot(path):
+    """加载截图，同一进程内同一文件只解码一次
+
+    返回的是共享的缓存对象，调用方不能原地修改（标注画在单独的图层上）
+    """
+    st = os.stat(path)
+    return _decode_screenshot(str(path), st.st_mtime_ns, st.st_size)
+
+def save_annotated(img, output_path, webp=False):
+    """保存标注图，返回实际保存路径
+
+    标注图只用于本地查看，优先编码速度：PNG使用最低压缩级别，
+    webp=True时改存为无损WebP（文件更小，编码也快）
+    """
+    if webp:
+        output_path = Path(output_path).with_suffix(".webp")
+        img.save(output_path, format="WEBP", lossless=True, quality=0)
+    else:
+        img.save(output_path, format="PNG", compress_level=1, optimize=False)
+    return output_path
+
+def iter_nodes(ui_dump):
+    """流式遍历dump中的node元素，处理完即释放，峰值内存只与树深度相关
+
+    ui_dump可以是文件路径，也可以是dump的原始字节；
+    文件以二进制一次读入，由解析器直接处理字节，不经过str解码。
+    产出的元素在调用方取下一个元素时被清空并从父节点摘除
+    """
+    if not isinstance(ui_dump, bytes):
+        ui_dump = Path(ui_dump).read_bytes()
+    source = io.BytesIO(ui_dump)
+
+    if LXML_AVAILABLE:
+        # lxml在C层完成标签过滤
+        for _, elem in ET.iterparse(source, events=("end",), tag="node"):
+            yield elem
+            elem.clear()
+            # lxml的clear()不会从父节点摘除，需顺带删掉已处理的兄弟节点
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        return
+
+    # 标准库没有getparent()，用start事件维护父节点栈
+    parents = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == "node":
+            yield elem
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+def iter_ui_elements(ui_dump):
+    """
+    流式遍历带bounds的UI元素（ui_dump为文件路径或原始字节）
+
+    Yields:
+        (bounds, class_name, content_desc, text, clickable)
+        元素本身随后会被释放，因此不包含在结果中；
+        需要保存的元素再用make_elem_info构造
+    """
+    for elem in iter_nodes(ui_dump):
+        bounds = parse_bounds(elem.get("bounds"))
+        if not bounds:
+            continue
+
+        class_name = elem.get("class", "")
+        content_desc = elem.get("content-desc", "").strip()
+        text = elem.get("text", "").strip()
+        clickable = elem.get("clickable", "false") == "true"
+        yield bounds, class_name, content_desc, text, clickable
+
+def load_ui_arrays(ui_dump):
+    """一次遍历把带bounds的node收集为列式数组（SoA），bounds整体向量化解析
+
+    Returns:
+        (bounds, class_names, content_descs, texts, clickables)
+        bounds为(N, 4)的int32数组，其余为等长列表，同一下标对应同一元素
+    """
+    bounds_strs, class_names, content_descs, texts, clickables = [], [], [], [], []
+    for elem in iter_nodes(ui_dump):
+        bounds_str = elem.get("bounds")
+        if not bounds_str:
+            continue
+        bounds_strs.append(bounds_str)
+        class_names.append(elem.get("class", ""))
+        content_descs.append(elem.get("content-desc", "").strip())
+        texts.append(elem.get("text", "").strip())
+        clickables.append(elem.get("clickable", "false") == "true")
+
+    # 所有bounds拼成一个字符串，一次正则扫描得到全部坐标
+    # 每行至多一个匹配，总数等于行数即说明每行都恰好解析成功
+    coords = _BOUNDS_LINE_RE.findall("\n".join(bounds_strs))
+    if len(coords) != len(bounds_strs):
+        # 存在格式异常的bounds，退回逐行解析并剔除无法解析的行
+        parsed = [parse_bounds(b) for b in bounds_strs]
+        keep = [i for i, b in enumerate(parsed) if b]
+        coords = [parsed[i] for i in keep]
+        class_names = [class_names[i] for i in keep]
+        content_descs = [content_descs[i] for i in keep]
+        texts = [texts[i] for i in keep]
+        clickables = [clickables[i] for i in keep]
+    bounds = np.array(coords, dtype=np.int32).reshape(-1, 4)
+    return bounds, class_names, content_descs, texts, clickables
@@ -2,124 +2,151 @@
 """
 分析首页结构并在截图上标注
 """
-from PIL import Image, ImageDraw, ImageFont
-import xml.etree.ElementTree as ET
+from PIL import Image, ImageDraw
 from pathlib import Path
+import re
 import sys
 
-def parse_bounds(bounds_str):
-    """解析bounds字符串为坐标元组"""
-    if not bounds_str:
-        return None
-    try:
-        # 格式: "[x1,y1][x2,y2]"
-        parts = bounds_str.split("][")
-        if len(parts) != 2:
-            return None
-        coord1 = parts[0].replace("[", "").split(",")
-        coord2 = parts[1].replace("]", "").split(",")
-        x1, y1 = int(coord1[0]), int(coord1[1])
-        x2, y2 = int(coord2[0]), int(coord2[1])
-        return (x1, y1, x2, y2)
-    except:
-        return None
+from _ui_dump_common import (
+    iter_ui_elements, make_elem_info, save_annotated,
+    _load_font, _load_screenshot, _BUTTON_CLASSES,
+)
 
-def analyze_homepage_ui_dump(ui_dump_path):
-    """分析首页UI dump，提取关键元素"""
-    with open(ui_dump_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    root = ET.fromstring(content)
+# 首页关键词分类：Exercise按钮 / Part按钮（含A/B/C） / 语言切换按钮
+_CLASSIFY_RE = re.compile(
+    r"(?P<exercise>exercise)"
+    r"|(?P<part>part(?: (?P<kind>[abc]))?)"
+    r"|(?P<language>language|bahasa|tukar)"
+    r"|(?P<language_zh>切换|语言)"
+)
+
+def analyze_homepage_ui_dump(ui_dump_path, collect_text_elements=False):
+    """分析首页UI dump，提取关键元素
     
+    Args:
+        ui_dump_path: UI dump文件路径
+        collect_text_elements: 是否收集长文本元素（标注和打印都用不到，默认不收集）
+    """
     elements = {
         "exercise_button": None,
         "part_buttons": [],
         "language_button": None,
-        "other_buttons": [],
-        "text_elements": []
+        "other_buttons": []
     }
+    if collect_text_elements:
+        elements["text_elements"] = []
     
-    for elem in root.iter():
-        class_name = elem.get("class", "")
-        content_desc = elem.get("content-desc", "").strip()
-        text = elem.get("text", "").strip()
-        bounds = parse_bounds(elem.get("bounds", ""))
-        clickable = elem.get("clickable", "false") == "true"
+    for bounds, class_name, content_desc, text, clickable in iter_ui_elements(ui_dump_path):
+        y1 = bounds[1]
         
-        if not bounds:
+        # 收集文本元素（用于理解页面结构），排除顶部状态栏
+        is_text_element = collect_text_elements and bool(content_desc or text) and len(content_desc + text) > 10 and y1 > 500
+        # 其余类别都要求可点击，两者都不满足的元素直接跳过
+        if not clickable and not is_text_element:
             continue
         
-        x1, y1, x2, y2 = bounds
-        center = ((x1 + x2) // 2, (y1 + y2) // 2)
-        width = x2 - x1
-        height = y2 - y1
-        
         combined_text = (content_desc + " " + text).lower()
+        elem_info = make_elem_info(bounds, class_name, content_desc, text, clickable)
         
-        elem_info = {
-            "element": elem,
-            "bounds": bounds,
-            "center": center,
-            "size": (width, height),
-            "class": class_name,
-            "content_desc": content_desc,
-            "text": text,
-            "clickable": clickable
-        }
+        # 一次正则扫描得到全部关键词分类，后续判断复用结果
+        # 中文关键词（切换/语言）只用于识别语言按钮，不从"其他按钮"中排除
+        has_exercise = has_part = is_language = has_language_en = False
+        part_kind = None
+        for m in _CLASSIFY_RE.finditer(combined_text):
+            group = m.lastgroup
+            if group == "exercise":
+                has_exercise = True
+            elif group == "part":
+                has_part = True
+                part_kind = part_kind or m.group("kind")
+            else:
+                is_language = True
+                if group == "language":
+                    has_language_en = True
         
         # 识别Exercise按钮
-        if "exercise" in combined_text and clickable:
-            if not elements["exercise_button"] or y1 < elements["exercise_button"]["bounds"][1]:
+        if has_exercise and clickable:
+            if not elements["exercise_button"] or y1 < elements["exercise_button"].bounds[1]:
                 elements["exercise_button"] = elem_info
         
         # 识别Part按钮（A, B, C）
-        if "part" in combined_text and clickable:
-            # 检查是否是Part A/B/C
-            if any(part in combined_text for part in ["part a", "part b", "part c"]):
-                elements["part_buttons"].append(elem_info)
+        if part_kind and clickable:
+            elements["part_buttons"].append(elem_info)
         
         # 识别语言切换按钮
-        if any(keyword in combined_text for keyword in ["language", "bahasa", "tukar", "切换", "语言"]):
-            if clickable:
-                elements["language_button"] = elem_info
+        if is_language and clickable:
+            elements["language_button"] = elem_info
         
         # 收集其他可点击按钮
-        if clickable and class_name.endswith("Button"):
-            if not any([
-                "exercise" in combined_text,
-                "part" in combined_text,
-                "language" in combined_text or "bahasa" in combined_text or "tukar" in combined_text
-            ]):
+        if clickable and class_name in _BUTTON_CLASSES:
+            if not (has_exercise or has_part or has_language_en):
                 elements["other_buttons"].append(elem_info)
         
-        # 收集文本元素（用于理解页面结构）
-        if (content_desc or text) and len(content_desc + text) > 10:
-            if y1 > 500:  # 排除顶部状态栏
-                elements["text_elements"].append(elem_info)
+        if is_text_element:
+            elements["text_elements"].append(elem_info)
     
     # 按Y坐标排序Part按钮
-    elements["part_buttons"].sort(key=lambda x: x["bounds"][1])
+    elements["part_buttons"].sort(key=lambda x: x.bounds[1])
     
     return elements
 
-def annotate_homepage_screenshot(screenshot_path, ui_dump_path, output_path):
+def format_report(elements, output_path):
+    """生成分析结果的文本行"""
+    report_lines = []
+    report_lines.append("=" * 60)
+    report_lines.append("📊 首页结构分析")
+    report_lines.append("=" * 60)
+    report_lines.append(f"\n📍 元素位置信息:")
+    
+    if elements["exercise_button"]:
+        info = elements["exercise_button"]
+        report_lines.append(f"  Exercise按钮: {info.bounds} 中心={info.center}")
+        report_lines.append(f"    内容: '{info.content_desc or info.text}'")
+    
+    report_lines.append(f"\n  Part按钮 ({len(elements['part_buttons'])} 个):")
+    for idx, part in enumerate(elements["part_buttons"]):
+        label = part.content_desc or part.text or f"Part {idx+1}"
+        report_lines.append(f"    {label}: {part.bounds} 中心={part.center} 尺寸={part.size}")
+    
+    if elements["language_button"]:
+        info = elements["language_button"]
+        report_lines.append(f"\n  语言切换按钮: {info.bounds} 中心={info.center}")
+        report_lines.append(f"    内容: '{info.content_desc or info.text}'")
+        report_lines.append(f"    ⚠️  注意：这个按钮在Y={info.center[1]}，Part按钮在Y={elements['part_buttons'][0].center[1] if elements['part_buttons'] else 'N/A'}")
+    
+    if elements["other_buttons"]:
+        report_lines.append(f"\n  其他按钮 ({len(elements['other_buttons'])} 个):")
+        for btn in elements["other_buttons"][:5]:
+            label = btn.content_desc or btn.text or "Unknown"
+            report_lines.append(f"    {label}: {btn.bounds}")
+    
+    report_lines.append(f"\n✓ 标注完成，保存到: {output_path}")
+    report_lines.append("=" * 60)
+    
+    # 输出重要提示
+    if elements["language_button"] and elements["part_buttons"]:
+        lang_y = elements["language_button"].center[1]
+        part_y = elements["part_buttons"][0].center[1]
+        if lang_y < part_y:
+            report_lines.append(f"\n⚠️  重要提示：")
+            report_lines.append(f"  语言切换按钮 (Y={lang_y}) 在 Part按钮 (Y={part_y}) 上方")
+            report_lines.append(f"  点击Part按钮时需要确保Y坐标 > {lang_y + 50}，避免误点击语言按钮")
+    return report_lines
+
+def annotate_homepage_screenshot(screenshot_path, ui_dump_path, output_path, quiet=False, webp=False):
     """在首页截图上标注UI元素"""
     # 分析UI dump
     elements = analyze_homepage_ui_dump(ui_dump_path)
     
     # 打开截图
-    img = Image.open(screenshot_path)
-    draw = ImageDraw.Draw(img)
-    
-    # 尝试加载字体
-    try:
-        font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 28)
-        font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 20)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 16)
-    except:
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    img = _load_screenshot(screenshot_path)
+    # 所有标注先画到透明图层上，最后一次性合成到截图
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    
+    font_large = _load_font(28)
+    font_medium = _load_font(20)
+    font_small = _load_font(16)
     
     colors = {
         "exercise": "blue",
@@ -128,100 +155,73 @@ def annotate_homepage_screenshot(screenshot_path, ui_dump_path, output_path):
         "other": "orange"
     }
     
+    # 每类标注的文字样式只构造一次
+    text_kw = {
+        key: {"fill": color, "font": font_medium, "stroke_width": 2, "stroke_fill": "white"}
+        for key, color in colors.items()
+    }
+    text_kw["other"].update(font=font_small, stroke_width=1)
+    
     # 标注Exercise按钮
     if elements["exercise_button"]:
         info = elements["exercise_button"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["exercise"], width=4)
-        label = info["content_desc"] or info["text"] or "Exercise"
-        draw.text((x1, y1 - 30), f"Exercise按钮: {label}", 
-                 fill=colors["exercise"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
-        cx, cy = info["center"]
+        label = info.content_desc or info.text or "Exercise"
+        draw.text((x1, y1 - 30), f"Exercise按钮: {label}", **text_kw["exercise"])
+        cx, cy = info.center
         draw.ellipse([cx-10, cy-10, cx+10, cy+10], fill=colors["exercise"], outline="white", width=2)
     
     # 标注Part按钮
     part_labels = ["Part A", "Part B", "Part C"]
     for idx, part in enumerate(elements["part_buttons"]):
-        x1, y1, x2, y2 = part["bounds"]
+        x1, y1, x2, y2 = part.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["part"], width=4)
-        label = part["content_desc"] or part["text"] or part_labels[idx] if idx < len(part_labels) else f"Part {idx+1}"
-        draw.text((x1, y1 - 30), label, 
-                 fill=colors["part"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
-        cx, cy = part["center"]
+        label = part.content_desc or part.text or part_labels[idx] if idx < len(part_labels) else f"Part {idx+1}"
+        draw.text((x1, y1 - 30), label, **text_kw["part"])
+        cx, cy = part.center
         draw.ellipse([cx-10, cy-10, cx+10, cy+10], fill=colors["part"], outline="white", width=2)
     
     # 标注语言切换按钮
     if elements["language_button"]:
         info = elements["language_button"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["language"], width=4)
-        label = info["content_desc"] or info["text"] or "Language"
-        draw.text((x1, y1 - 30), f"语言切换: {label}", 
-                 fill=colors["language"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
-        cx, cy = info["center"]
+        label = info.content_desc or info.text or "Language"
+        draw.text((x1, y1 - 30), f"语言切换: {label}", **text_kw["language"])
+        cx, cy = info.center
         draw.ellipse([cx-10, cy-10, cx+10, cy+10], fill=colors["language"], outline="white", width=2)
     
     # 标注其他按钮（最多显示5个）
     for idx, btn in enumerate(elements["other_buttons"][:5]):
-        x1, y1, x2, y2 = btn["bounds"]
+        x1, y1, x2, y2 = btn.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["other"], width=2)
-        label = btn["content_desc"] or btn["text"] or f"Button {idx+1}"
+        label = btn.content_desc or btn.text or f"Button {idx+1}"
         if len(label) > 20:
             label = label[:20] + "..."
-        draw.text((x1, y1 - 25), label, 
-                 fill=colors["other"], font=font_small,
-                 stroke_width=1, stroke_fill="white")
-    
-    # 保存标注后的图片
-    img.save(output_path)
-    
-    # 打印分析结果
-    print("=" * 60)
-    print("📊 首页结构分析")
-    print("=" * 60)
-    print(f"\n📍 元素位置信息:")
+        draw.text((x1, y1 - 25), label, **text_kw["other"])
     
-    if elements["exercise_button"]:
-        info = elements["exercise_button"]
-        print(f"  Exercise按钮: {info['bounds']} 中心={info['center']}")
-        print(f"    内容: '{info['content_desc'] or info['text']}'")
+    # 合成标注图层并保存
+    img = Image.alpha_composite(img, overlay)
+    output_path = save_annotated(img, output_path, webp=webp)
     
-    print(f"\n  Part按钮 ({len(elements['part_buttons'])} 个):")
-    for idx, part in enumerate(elements["part_buttons"]):
-        label = part["content_desc"] or part["text"] or f"Part {idx+1}"
-        print(f"    {label}: {part['bounds']} 中心={part['center']} 尺寸={part['size']}")
-    
-    if elements["language_button"]:
-        info = elements["language_button"]
-        print(f"\n  语言切换按钮: {info['bounds']} 中心={info['center']}")
-        print(f"    内容: '{info['content_desc'] or info['text']}'")
-        print(f"    ⚠️  注意：这个按钮在Y={info['center'][1]}，Part按钮在Y={elements['part_buttons'][0]['center'][1] if elements['part_buttons'] else 'N/A'}")
-    
-    if elements["other_buttons"]:
-        print(f"\n  其他按钮 ({len(elements['other_buttons'])} 个):")
-        for btn in elements["other_buttons"][:5]:
-            label = btn["content_desc"] or btn["text"] or "Unknown"
-            print(f"    {label}: {btn['bounds']}")
-    
-    print(f"\n✓ 标注完成，保存到: {output_path}")
-    print("=" * 60)
-    
-    # 输出重要提示
-    if elements["language_button"] and elements["part_buttons"]:
-        lang_y = elements["language_button"]["center"][1]
-        part_y = elements["part_buttons"][0]["center"][1]
-        if lang_y < part_y:
-            print(f"\n⚠️  重要提示：")
-            print(f"  语言切换按钮 (Y={lang_y}) 在 Part按钮 (Y={part_y}) 上方")
-            print(f"  点击Part按钮时需要确保Y坐标 > {lang_y + 50}，避免误点击语言按钮")
+    # 打印分析结果（整份报告一次写出，quiet时不生成）
+    if not quiet:
+        print("\n".join(format_report(elements, output_path)))
 
 if __name__ == "__main__":
-    ui_dump_path = "/tmp/homepage_ui_dump.xml"
-    screenshot_path = "/tmp/homepage_screenshot.png"
-    output_path = "/Users/sh01617ml/workspace/KPP/screenshots/annotated_homepage.png"
+    import argparse
+    parser = argparse.ArgumentParser(description="分析首页结构并在截图上标注")
+    parser.add_argument("--ui-dump", default="/tmp/homepage_ui_dump.xml", help="UI dump文件路径")
+    parser.add_argument("--screenshot", default="/tmp/homepage_screenshot.png", help="截图文件路径")
+    parser.add_argument("--output", default="/Users/sh01617ml/workspace/KPP/screenshots/annotated_homepage.png", help="标注后图片的保存路径")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不打印分析结果")
+    parser.add_argument("--webp", action="store_true", help="标注图保存为无损WebP")
+    args = parser.parse_args()
+    
+    ui_dump_path = args.ui_dump
+    screenshot_path = args.screenshot
+    output_path = args.output
     
     if not Path(ui_dump_path).exists():
         print(f"❌ UI dump文件不存在: {ui_dump_path}")
@@ -231,4 +231,4 @@ if __name__ == "__main__":
         print(f"❌ 截图文件不存在: {screenshot_path}")
         sys.exit(1)
     
-    annotate_homepage_screenshot(screenshot_path, ui_dump_path, output_path)
+    annotate_homepage_screenshot(screenshot_path, ui_dump_path, output_path, quiet=args.quiet, webp=args.webp)
@@ -2,35 +2,18 @@
 """
 分析题目页面结构并在截图上标注
 """
-from PIL import Image, ImageDraw, ImageFont
-import xml.etree.ElementTree as ET
+from PIL import Image, ImageDraw
 from pathlib import Path
+import numpy as np
 import sys
 
-def parse_bounds(bounds_str):
-    """解析bounds字符串为坐标元组"""
-    if not bounds_str:
-        return None
-    try:
-        # 格式: "[x1,y1][x2,y2]"
-        parts = bounds_str.split("][")
-        if len(parts) != 2:
-            return None
-        coord1 = parts[0].replace("[", "").split(",")
-        coord2 = parts[1].replace("]", "").split(",")
-        x1, y1 = int(coord1[0]), int(coord1[1])
-        x2, y2 = int(coord2[0]), int(coord2[1])
-        return (x1, y1, x2, y2)
-    except:
-        return None
+from _ui_dump_common import (
+    load_ui_arrays, make_elem_info, save_annotated,
+    _load_font, _load_screenshot, _BUTTON_CLASSES, _IMAGE_CLASSES,
+)
 
 def analyze_ui_dump(ui_dump_path):
     """分析UI dump，提取关键元素"""
-    with open(ui_dump_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    root = ET.fromstring(content)
-    
     elements = {
         "back_button": None,
         "question_number": None,
@@ -42,88 +25,113 @@ def analyze_ui_dump(ui_dump_path):
         "other_buttons": []
     }
     
-    for elem in root.iter():
-        class_name = elem.get("class", "")
-        content_desc = elem.get("content-desc", "").strip()
-        text = elem.get("text", "").strip()
-        bounds = parse_bounds(elem.get("bounds", ""))
-        
-        if not bounds:
-            continue
-        
-        x1, y1, x2, y2 = bounds
-        center = ((x1 + x2) // 2, (y1 + y2) // 2)
-        width = x2 - x1
-        height = y2 - y1
-        
-        elem_info = {
-            "element": elem,
-            "bounds": bounds,
-            "center": center,
-            "size": (width, height),
-            "class": class_name,
-            "content_desc": content_desc,
-            "text": text
-        }
-        
-        # 识别Back按钮
-        if content_desc.lower() == "back" or (class_name.endswith("Button") and y1 < 400):
-            if "back" in content_desc.lower():
-                elements["back_button"] = elem_info
-        
-        # 识别题目编号（如 "19/150"）
-        if "/" in content_desc and y1 < 300:
-            elements["question_number"] = elem_info
-        
-        # 识别题目文本（通常在ScrollView中，Y坐标在300-1500之间，宽度较大）
-        if y1 > 300 and y1 < 1500 and width > 800 and (content_desc or text):
-            if len(content_desc) > 50 or len(text) > 50:
-                if not elements["question_text"] or y1 < elements["question_text"]["bounds"][1]:
-                    elements["question_text"] = elem_info
-        
-        # 识别ImageView（题目中的图片）
-        if class_name.endswith("ImageView") and width > 100 and height > 100:
-            if 1000 < y1 < 2000:  # 题目图片通常在题目文本下方，选项上方
-                elements["question_image"] = elem_info
-        
-        # 识别选项按钮（A, B, C, D）
-        if class_name.endswith("Button") and content_desc in ["A", "B", "C", "D"]:
-            if 1800 < y1 < 2500:  # 选项通常在屏幕中下部
-                elements["options"].append(elem_info)
-        
-        # 识别Previous按钮
-        if "previous" in content_desc.lower() or "上一" in content_desc:
-            if y1 > 2400:
-                elements["previous_button"] = elem_info
-        
-        # 识别Next按钮
-        if "next" in content_desc.lower() or "下一" in content_desc:
-            if y1 > 2400:
-                elements["next_button"] = elem_info
+    bounds, class_names, content_descs, texts, clickables = load_ui_arrays(ui_dump_path)
+    x1, y1, x2, y2 = bounds.T
+    width = x2 - x1
+    height = y2 - y1
+    
+    def elem_info(i):
+        return make_elem_info(tuple(bounds[i].tolist()), class_names[i], content_descs[i],
+                              texts[i], clickables[i])
+    
+    # 几何条件用数组掩码一次算出，只对落在区域内的元素做字符串判断
+    # 识别Back按钮
+    for i, content_desc in enumerate(content_descs):
+        desc_lower = content_desc.lower()
+        if "back" in desc_lower:
+            if desc_lower == "back" or (class_names[i] in _BUTTON_CLASSES and y1[i] < 400):
+                elements["back_button"] = elem_info(i)
+    
+    # 识别题目编号（如 "19/150"）
+    for i in np.flatnonzero(y1 < 300):
+        if "/" in content_descs[i]:
+            elements["question_number"] = elem_info(i)
+    
+    # 识别题目文本（通常在ScrollView中，Y坐标在300-1500之间，宽度较大），取最靠上的一个
+    text_zone = np.flatnonzero((y1 > 300) & (y1 < 1500) & (width > 800))
+    text_hits = [i for i in text_zone if len(content_descs[i]) > 50 or len(texts[i]) > 50]
+    if text_hits:
+        elements["question_text"] = elem_info(min(text_hits, key=lambda i: y1[i]))
+    
+    # 识别ImageView（题目中的图片），通常在题目文本下方，选项上方
+    for i in np.flatnonzero((y1 > 1000) & (y1 < 2000) & (width > 100) & (height > 100)):
+        if class_names[i] in _IMAGE_CLASSES:
+            elements["question_image"] = elem_info(i)
+    
+    # 识别选项按钮（A, B, C, D），选项通常在屏幕中下部
+    for i in np.flatnonzero((y1 > 1800) & (y1 < 2500)):
+        if class_names[i] in _BUTTON_CLASSES and content_descs[i] in ["A", "B", "C", "D"]:
+            elements["options"].append(elem_info(i))
+    
+    # 识别Previous/Next按钮
+    for i in np.flatnonzero(y1 > 2400):
+        content_desc = content_descs[i]
+        desc_lower = content_desc.lower()
+        if "previous" in desc_lower or "上一" in content_desc:
+            elements["previous_button"] = elem_info(i)
+        if "next" in desc_lower or "下一" in content_desc:
+            elements["next_button"] = elem_info(i)
     
     # 按Y坐标排序选项
-    elements["options"].sort(key=lambda x: x["bounds"][1])
+    elements["options"].sort(key=lambda x: x.bounds[1])
     
     return elements
 
-def annotate_screenshot(screenshot_path, ui_dump_path, output_path):
+def format_report(elements, output_path):
+    """生成分析结果的文本行"""
+    report_lines = []
+    report_lines.append("=" * 60)
+    report_lines.append("📊 题目页面结构分析")
+    report_lines.append("=" * 60)
+    report_lines.append(f"\n📍 元素位置信息:")
+    
+    if elements["back_button"]:
+        info = elements["back_button"]
+        report_lines.append(f"  Back按钮: {info.bounds} 中心={info.center}")
+    
+    if elements["question_number"]:
+        info = elements["question_number"]
+        report_lines.append(f"  题目编号: {info.bounds} 内容='{info.content_desc}'")
+    
+    if elements["question_text"]:
+        info = elements["question_text"]
+        report_lines.append(f"  题目文本: {info.bounds} 尺寸={info.size}")
+        report_lines.append(f"    内容预览: {(info.content_desc or info.text)[:100]}...")
+    
+    if elements["question_image"]:
+        info = elements["question_image"]
+        report_lines.append(f"  题目图片: {info.bounds} 尺寸={info.size} 中心={info.center}")
+    
+    report_lines.append(f"\n  选项 ({len(elements['options'])} 个):")
+    for option in elements["options"]:
+        report_lines.append(f"    选项 {option.content_desc}: {option.bounds} 中心={option.center}")
+    
+    if elements["previous_button"]:
+        info = elements["previous_button"]
+        report_lines.append(f"  Previous按钮: {info.bounds} 中心={info.center}")
+    
+    if elements["next_button"]:
+        info = elements["next_button"]
+        report_lines.append(f"  Next按钮: {info.bounds} 中心={info.center}")
+    
+    report_lines.append(f"\n✓ 标注完成，保存到: {output_path}")
+    report_lines.append("=" * 60)
+    return report_lines
+
+def annotate_screenshot(screenshot_path, ui_dump_path, output_path, quiet=False, webp=False):
     """在截图上标注UI元素"""
     # 分析UI dump
     elements = analyze_ui_dump(ui_dump_path)
     
     # 打开截图
-    img = Image.open(screenshot_path)
-    draw = ImageDraw.Draw(img)
-    
-    # 尝试加载字体（如果失败则使用默认字体）
-    try:
-        font_large = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 24)
-        font_medium = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-        font_small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 14)
-    except:
-        font_large = ImageFont.load_default()
-        font_medium = ImageFont.load_default()
-        font_small = ImageFont.load_default()
+    img = _load_screenshot(screenshot_path)
+    # 所有标注先画到透明图层上，最后一次性合成到截图
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    
+    font_large = _load_font(24)
+    font_medium = _load_font(18)
+    font_small = _load_font(14)
     
     colors = {
         "back_button": "orange",
@@ -135,121 +143,90 @@ def annotate_screenshot(screenshot_path, ui_dump_path, output_path):
         "next_button": "magenta"
     }
     
+    # 每类标注的文字样式只构造一次
+    text_kw = {
+        key: {"fill": color, "font": font_medium, "stroke_width": 2, "stroke_fill": "white"}
+        for key, color in colors.items()
+    }
+    
     # 标注Back按钮
     if elements["back_button"]:
         info = elements["back_button"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["back_button"], width=3)
-        draw.text((x1, y1 - 25), "Back按钮", fill=colors["back_button"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        draw.text((x1, y1 - 25), "Back按钮", **text_kw["back_button"])
     
     # 标注题目编号
     if elements["question_number"]:
         info = elements["question_number"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["question_number"], width=3)
-        draw.text((x1, y1 - 25), f"题目编号: {info['content_desc']}", 
-                 fill=colors["question_number"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        draw.text((x1, y1 - 25), f"题目编号: {info.content_desc}", **text_kw["question_number"])
     
     # 标注题目文本
     if elements["question_text"]:
         info = elements["question_text"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["question_text"], width=3)
-        text_preview = (info["content_desc"] or info["text"])[:30] + "..."
-        draw.text((x1, y1 - 25), f"题目文本: {text_preview}", 
-                 fill=colors["question_text"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        text_preview = (info.content_desc or info.text)[:30] + "..."
+        draw.text((x1, y1 - 25), f"题目文本: {text_preview}", **text_kw["question_text"])
     
     # 标注题目图片
     if elements["question_image"]:
         info = elements["question_image"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["question_image"], width=4)
-        draw.text((x1, y1 - 25), "题目图片 (ImageView)", 
-                 fill=colors["question_image"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        draw.text((x1, y1 - 25), "题目图片 (ImageView)", **text_kw["question_image"])
         # 在中心画一个X标记
-        cx, cy = info["center"]
+        cx, cy = info.center
         draw.line([cx-20, cy-20, cx+20, cy+20], fill=colors["question_image"], width=3)
         draw.line([cx-20, cy+20, cx+20, cy-20], fill=colors["question_image"], width=3)
     
     # 标注选项
     for idx, option in enumerate(elements["options"]):
-        x1, y1, x2, y2 = option["bounds"]
-        label = option["content_desc"]
+        x1, y1, x2, y2 = option.bounds
+        label = option.content_desc
         draw.rectangle([x1, y1, x2, y2], outline=colors["option"], width=3)
-        draw.text((x1, y1 - 25), f"选项 {label}", 
-                 fill=colors["option"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        draw.text((x1, y1 - 25), f"选项 {label}", **text_kw["option"])
         # 标注选项中心点
-        cx, cy = option["center"]
+        cx, cy = option.center
         draw.ellipse([cx-8, cy-8, cx+8, cy+8], fill=colors["option"], outline="white", width=2)
     
     # 标注Previous按钮
     if elements["previous_button"]:
         info = elements["previous_button"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["previous_button"], width=3)
-        draw.text((x1, y1 - 25), "Previous按钮", 
-                 fill=colors["previous_button"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
+        draw.text((x1, y1 - 25), "Previous按钮", **text_kw["previous_button"])
     
     # 标注Next按钮
     if elements["next_button"]:
         info = elements["next_button"]
-        x1, y1, x2, y2 = info["bounds"]
+        x1, y1, x2, y2 = info.bounds
         draw.rectangle([x1, y1, x2, y2], outline=colors["next_button"], width=3)
-        draw.text((x1, y1 - 25), "Next按钮", 
-                 fill=colors["next_button"], font=font_medium,
-                 stroke_width=2, stroke_fill="white")
-    
-    # 保存标注后的图片
-    img.save(output_path)
-    
-    # 打印分析结果
-    print("=" * 60)
-    print("📊 题目页面结构分析")
-    print("=" * 60)
-    print(f"\n📍 元素位置信息:")
-    
-    if elements["back_button"]:
-        info = elements["back_button"]
-        print(f"  Back按钮: {info['bounds']} 中心={info['center']}")
-    
-    if elements["question_number"]:
-        info = elements["question_number"]
-        print(f"  题目编号: {info['bounds']} 内容='{info['content_desc']}'")
-    
-    if elements["question_text"]:
-        info = elements["question_text"]
-        print(f"  题目文本: {info['bounds']} 尺寸={info['size']}")
-        print(f"    内容预览: {(info['content_desc'] or info['text'])[:100]}...")
-    
-    if elements["question_image"]:
-        info = elements["question_image"]
-        print(f"  题目图片: {info['bounds']} 尺寸={info['size']} 中心={info['center']}")
-    
-    print(f"\n  选项 ({len(elements['options'])} 个):")
-    for option in elements["options"]:
-        print(f"    选项 {option['content_desc']}: {option['bounds']} 中心={option['center']}")
-    
-    if elements["previous_button"]:
-        info = elements["previous_button"]
-        print(f"  Previous按钮: {info['bounds']} 中心={info['center']}")
+        draw.text((x1, y1 - 25), "Next按钮", **text_kw["next_button"])
     
-    if elements["next_button"]:
-        info = elements["next_button"]
-        print(f"  Next按钮: {info['bounds']} 中心={info['center']}")
+    # 合成标注图层并保存
+    img = Image.alpha_composite(img, overlay)
+    output_path = save_annotated(img, output_path, webp=webp)
     
-    print(f"\n✓ 标注完成，保存到: {output_path}")
-    print("=" * 60)
+    # 打印分析结果（整份报告一次写出，quiet时不生成）
+    if not quiet:
+        print("\n".join(format_report(elements, output_path)))
 
 if __name__ == "__main__":
-    ui_dump_path = "/tmp/current_ui_dump.xml"
-    screenshot_path = "/tmp/current_screenshot.png"
-    output_path = "/Users/sh01617ml/workspace/KPP/screenshots/annotated_question_page.png"
+    import argparse
+    parser = argparse.ArgumentParser(description="分析题目页面结构并在截图上标注")
+    parser.add_argument("--ui-dump", default="/tmp/current_ui_dump.xml", help="UI dump文件路径")
+    parser.add_argument("--screenshot", default="/tmp/current_screenshot.png", help="截图文件路径")
+    parser.add_argument("--output", default="/Users/sh01617ml/workspace/KPP/screenshots/annotated_question_page.png", help="标注后图片的保存路径")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不打印分析结果")
+    parser.add_argument("--webp", action="store_true", help="标注图保存为无损WebP")
+    args = parser.parse_args()
+    
+    ui_dump_path = args.ui_dump
+    screenshot_path = args.screenshot
+    output_path = args.output
     
     if not Path(ui_dump_path).exists():
         print(f"❌ UI dump文件不存在: {ui_dump_path}")
@@ -259,4 +236,4 @@ if __name__ == "__main__":
         print(f"❌ 截图文件不存在: {screenshot_path}")
         sys.exit(1)
     
-    annotate_screenshot(screenshot_path, ui_dump_path, output_path)
+    annotate_screenshot(screenshot_path, ui_dump_path, output_path, quiet=args.quiet, webp=args.webp)
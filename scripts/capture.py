@@ -6,15 +6,43 @@ KPP题目截图采集脚本
 """
 
 import os
+import re
 import sys
+import atexit
+import filecmp
+import io
+import logging
+import signal
+import struct
 import json
 import time
+import select
 import subprocess
-import xml.etree.ElementTree as ET
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple
 import hashlib
 from PIL import Image
+import numpy as np
+from lxml import etree as ET
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# 扫描/匹配过程的调试输出走logger.debug，默认级别INFO下不产生输出；
+# 状态变化（进入Part、点击、保存等）仍直接print
+logger = logging.getLogger("capture")
 
 # 配置
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -25,15 +53,124 @@ PROGRESS_FILE = Path(__file__).parent / "progress.json"
 WAIT_TIME_AFTER_CLICK = 2  # 点击选项后等待颜色反馈的时间（秒）
 WAIT_TIME_PAGE_UPDATE = 3  # 等待页面更新的时间（秒）
 AD_WAIT_TIMEOUT = 10  # 广告等待超时时间（秒）
+PROGRESS_SAVE_INTERVAL = 10  # 进度文件最短写入间隔（秒），期间的更新合并到下一次写入；退出和切换Part时立即写入
+UI_DUMP_DEVICE_PATH = "/data/local/tmp/kpp_ui_dump.xml"  # dump到/dev/tty不可用时的设备端临时文件
 
 # Part顺序
 PARTS_ORDER = ["A", "B", "C"]
+_PART_INDEX = {part: idx for idx, part in enumerate(PARTS_ORDER)}  # Part -> 在PARTS_ORDER中的位置
+
+# `adb devices`输出中状态为device的行（排除表头、offline、unauthorized等）
+_DEVICE_LINE_RE = re.compile(r"^(\S+)\s+device\b", re.M)
+
+# 已连接设备列表，进程内查询成功一次后复用；也可由父进程通过环境变量ADB_DEVICES传入（逗号分隔）
+_devices_cache: Optional[Tuple[str, ...]] = None
+
+
+def _keyword_re(keywords: List[str]) -> re.Pattern:
+    """把一组关键词编译成一个忽略大小写的交替正则（匹配对象为小写文本）"""
+    return re.compile("|".join(re.escape(k.lower()) for k in keywords))
+
+# 页面特征关键词，对元素文本做部分匹配（大小写不敏感）
+_HOME_RE = _keyword_re(["Exercise", "Theory Test", "KPP Test", "KEJARA System", "Colour Blind Test"])
+_LANGUAGE_RE = _keyword_re(["Bahasa Melayu", "English", "中文"])
+_AD_RE = _keyword_re(["关闭", "跳过", "Skip", "Close", "X", "×", "广告", "Ad"])
+_FINISH_RE = _keyword_re(["完成", "Finish", "Done", "Selesai"])
+_BACK_RE = _keyword_re(["返回", "Back", "Kembali"])
+_NEXT_RE = _keyword_re(["next", "下一"])
+# 广告关闭按钮关键词，按优先级排列（close_ad优先点击排在前面的关键词）
+_CLOSE_KEYWORDS = ["关闭", "跳过", "Skip", "Close", "X", "×"]
+_CLOSE_RE = _keyword_re(_CLOSE_KEYWORDS)
+_CLOSE_RANK = {k.lower(): i for i, k in enumerate(_CLOSE_KEYWORDS)}
+# Part按钮：排除首页其他入口/语言切换，再匹配Part名称
+_PART_EXCLUDE_RE = _keyword_re(["exercise", "theory", "colour", "blind", "kejara", "tukar", "bahasa",
+                                "change", "language", "中文", "english"])
+_PART_RE = _keyword_re(["part a", "part b", "part c", "a 部分", "b 部分", "c 部分"])
+# 明显不是选项的可点击元素（导航、语言切换、首页入口等）
+_OPTION_EXCLUDE_RE = _keyword_re([
+    "next", "previous", "上一", "下一", "back", "返回",
+    "tukar", "bahasa", "change", "language", "切换", "语言",
+    "exercise", "part", "theory", "colour", "blind", "kejara"
+])
+
+# 选项标签
+_OPTION_LABELS = ("A", "B", "C", "D")
+# 文本开头的标签前缀（"A. Stop"、"A Stop"），取前两个字符查表即可得到标签
+_OPTION_LABEL_PREFIXES = {f"{label}{sep}": label for label in _OPTION_LABELS for sep in (".", " ")}
+# 以空格分隔的独立标签词（等价于 f" {label} " in f" {text} "）
+_OPTION_LABEL_WORD_RE = re.compile(r"(?:^|(?<= ))([ABCD])(?= |$)")
+
+# UI dump解析器：直接解析adb返回的字节，丢弃空白文本节点
+_XML_PARSER = ET.XMLParser(huge_tree=True, remove_blank_text=True)
+
+# 预编译的XPath：属性过滤在lxml的C层完成，只把候选节点交给Python
+_XP_NODES = ET.XPath('.//node')  # 所有后代node（不含自身）
+_XP_SELF_AND_NODES = ET.XPath('descendant-or-self::node')
+_XP_TAPPABLE = ET.XPath('.//node[@clickable="true" or @focusable="true"]')
+_XP_HAS_BOUNDS = ET.XPath('.//node[@bounds]')
+# 题目编号（如"19/150"）候选：content-desc或text含"/"
+_XP_SLASH = ET.XPath('.//node[contains(@content-desc, "/") or contains(@text, "/")]')
+# 题目文本候选：content-desc或text超过30字符（提取时再按去除空白后的长度精确判断）
+_XP_LONG_TEXT = ET.XPath('.//node[@bounds][string-length(@content-desc) > 30 or string-length(@text) > 30]')
+# XPath 1.0没有ends-with，用substring取class末尾9个字符（len("ImageView") == 9）
+_XP_IMAGEVIEW = ET.XPath('.//node[substring(@class, string-length(@class) - 8) = "ImageView"]')
+# content-desc或text含"next"（不区分大小写，translate只需转换这4个字母）
+_XP_NEXT_TEXT = ET.XPath('.//node[contains(translate(@content-desc, "NEXT", "next"), "next")'
+                         ' or contains(translate(@text, "NEXT", "next"), "next")]')
+
+def _write_json_atomic(path: Path, data):
+    """把data写成缩进2格的JSON：先写临时文件再原子替换，中途退出不会留下半个文件
+    
+    有orjson时用orjson序列化（输出格式与json.dump(indent=2, ensure_ascii=False)一致），
+    两种情况下都只调用一次write
+    """
+    tmp_file = path.with_suffix(".tmp")
+    if ORJSON_AVAILABLE:
+        tmp_file.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        # 先序列化成完整字符串再一次写入，避免json.dump逐片段调用write
+        tmp_file.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_file, path)
+
+# 题目JSON中即使为空也必须保留的字段（data_clean.validate_question_data检查这些键是否存在）
+_QUESTION_REQUIRED_FIELDS = frozenset({"id", "part", "question_number", "question_text", "options", "correct_answer"})
+
+def _is_empty_value(value) -> bool:
+    """None、False或空字符串/列表/字典（数字0不算空）"""
+    return value is None or value is False or (isinstance(value, (str, list, dict)) and not value)
+
+def _compact_question_data(question_data: Dict) -> Dict:
+    """去掉题目数据中的空字段（None、False、空字符串/列表/字典），减小文件体积
+    
+    必需字段始终保留；选项只去掉空的image/has_image，label和text保留。
+    下游脚本读取这些可选字段时都用.get()带默认值，缺省与原来的空值等价
+    """
+    compact = {}
+    for key, value in question_data.items():
+        if key == "options":
+            value = [
+                {k: v for k, v in opt.items() if k not in ("image", "has_image") or not _is_empty_value(v)}
+                for opt in value
+            ]
+        elif key not in _QUESTION_REQUIRED_FIELDS and _is_empty_value(value):
+            continue
+        compact[key] = value
+    return compact
 
 class ADBController:
     """ADB控制器"""
     
     def __init__(self, device_id: Optional[str] = None):
         self.device_id = device_id
+        self._shell: Optional[subprocess.Popen] = None  # 常驻的adb shell进程
+        self._cached_root = None  # 当前有效的UI树根节点（点击后失效）
+        self._cached_root_ts = 0.0  # 获取时间（time.monotonic）
+        self._last_root = None  # last_ui_hash对应的解析结果，dump内容不变时直接复用
+        self._dump_to_tty = True  # dump到/dev/tty失败后改用设备端临时文件
+        self._shot_buf = bytearray()  # 原始帧截图复用的读取缓冲区，见_read_raw_screencap
+        self.last_ui_hash: Optional[bytes] = None  # 最近一次解析的dump摘要，点击后不清除，用于判断页面是否变化
+        # 已解析的bounds，以元素对象为键（字典持有元素引用，lxml不会为同一节点换代理对象）
+        self._bounds_cache: Dict[ET._Element, Optional[Tuple[int, int, int, int]]] = {}
         self.check_adb_connection()
     
     def _adb_cmd(self, *args) -> List[str]:
@@ -46,14 +183,24 @@ class ADBController:
     
     def check_adb_connection(self):
         """检查adb连接"""
+        global _devices_cache
         try:
-            result = subprocess.run(
-                self._adb_cmd("devices"),
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            devices = [line for line in result.stdout.split("\n") if "device" in line and "List" not in line]
+            devices = _devices_cache
+            if devices is None:
+                env_devices = os.environ.get("ADB_DEVICES")
+                if env_devices:
+                    devices = tuple(env_devices.replace(",", " ").split())
+                else:
+                    result = subprocess.run(
+                        self._adb_cmd("devices"),
+                        capture_output=True,
+                        text=True,
+                        timeout=5
+                    )
+                    devices = tuple(_DEVICE_LINE_RE.findall(result.stdout))
+                # 没有设备时不缓存，下次重新查询
+                if devices:
+                    _devices_cache = devices
             if not devices:
                 raise Exception("未检测到adb设备连接")
             if self.device_id:
@@ -61,83 +208,242 @@ class ADBController:
             else:
                 if len(devices) > 1:
                     print(f"⚠️  检测到多个设备，建议使用 -d 参数指定设备ID")
-                    print(f"   可用设备: {[d.split()[0] for d in devices]}")
+                    print(f"   可用设备: {list(devices)}")
                 print("✓ ADB连接正常")
         except FileNotFoundError:
             raise Exception("未找到adb命令，请确保已安装Android SDK Platform Tools")
         except Exception as e:
             raise Exception(f"ADB连接失败: {e}")
     
-    def get_ui_tree(self) -> str:
-        """获取UI元素树（XML格式）"""
-        # 将UI树dump到设备
-        subprocess.run(
-            self._adb_cmd("shell", "uiautomator", "dump", "/sdcard/ui_dump.xml"),
-            check=True,
-            timeout=5
-        )
-        # 拉取到本地
-        subprocess.run(
-            self._adb_cmd("pull", "/sdcard/ui_dump.xml", "/tmp/ui_dump.xml"),
+    def _open_shell(self) -> subprocess.Popen:
+        """启动（或在退出后重启）常驻的adb shell进程"""
+        if self._shell is None or self._shell.poll() is not None:
+            self._shell = subprocess.Popen(
+                self._adb_cmd("shell"),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0
+            )
+        return self._shell
+    
+    def _shell_exec(self, cmd: str, timeout: float = 5) -> Tuple[int, bytes]:
+        """通过常驻adb shell执行命令，避免每条命令都重新启动adb进程
+        
+        命令后追加带随机标记的echo，读到标记即为该命令输出结束
+        
+        Returns:
+            (returncode, output): 命令退出码和输出字节（stderr已合并）
+        """
+        shell = self._open_shell()
+        marker = f"__KPP_EOF_{uuid.uuid4().hex}__".encode()
+        shell.stdin.write(cmd.encode() + b"; echo " + marker + b"$?\n")
+        
+        fd = shell.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        buf = bytearray()
+        while True:
+            pos = buf.find(marker)
+            # 标记后面跟着退出码和换行，读到换行才算完整
+            if pos != -1 and buf.find(b"\n", pos) != -1:
+                break
+            remaining = deadline - time.monotonic()
+            ready = select.select([fd], [], [], remaining)[0] if remaining > 0 else []
+            chunk = os.read(fd, 65536) if ready else b""
+            if not chunk:
+                # 超时或shell已退出：丢弃该进程，下次调用重新启动
+                self.close()
+                raise subprocess.TimeoutExpired(cmd, timeout)
+            buf += chunk
+        
+        line_end = buf.find(b"\n", pos)
+        returncode = int(buf[pos + len(marker):line_end].strip() or 1)
+        return returncode, bytes(buf[:pos])
+    
+    def close(self):
+        """关闭常驻的adb shell进程"""
+        if self._shell is not None:
+            if self._shell.poll() is None:
+                self._shell.kill()
+            self._shell.wait()
+            self._shell = None
+    
+    def get_ui_tree(self) -> bytes:
+        """获取UI元素树（XML格式）
+
+        dump直接输出到标准输出，经常驻shell取回XML字节，
+        不再经过设备端文件和pull；部分系统不支持dump到/dev/tty，
+        此时改为dump到/data/local/tmp（不走FUSE模拟的/sdcard）并在同一条命令里cat回来
+        """
+        if self._dump_to_tty:
+            returncode, xml = self._shell_exec("uiautomator dump /dev/tty")
+            start = xml.find(b"<?xml")
+            end = xml.rfind(b"</hierarchy>")
+            if returncode != 0 or start == -1 or end == -1:
+                self._dump_to_tty = False
+        if not self._dump_to_tty:
+            returncode, xml = self._shell_exec(
+                f"uiautomator dump {UI_DUMP_DEVICE_PATH} >/dev/null && cat {UI_DUMP_DEVICE_PATH}"
+            )
+            start = xml.find(b"<?xml")
+            end = xml.rfind(b"</hierarchy>")
+        if returncode != 0 or start == -1 or end == -1:
+            raise Exception(f"获取UI树失败: {xml[-200:].decode(errors='replace')}")
+        # 去掉末尾的 "UI hierchary dumped to: /dev/tty" 提示行
+        return xml[start:end + len(b"</hierarchy>")]
+    
+    def get_ui_tree_parsed(self, max_age: float = 0.5):
+        """获取解析后的UI树根节点
+        
+        同一页面状态只dump和解析一次：距上次解析不超过max_age秒、
+        且期间没有点击时直接返回缓存的根节点（max_age=0强制重新获取）
+        """
+        if self._cached_root is None or time.monotonic() - self._cached_root_ts > max_age:
+            self._set_cached_tree(self.get_ui_tree())
+        return self._cached_root
+    
+    @staticmethod
+    def ui_hash(xml: bytes) -> bytes:
+        """UI dump的8字节摘要，用于快速判断页面是否变化（有xxhash时用xxh3，否则用BLAKE2b）"""
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64_digest(xml)
+        return hashlib.blake2b(xml, digest_size=8).digest()
+    
+    def _set_cached_tree(self, xml: bytes):
+        """解析dump并作为当前缓存的UI树
+        
+        dump与上次解析的内容相同（摘要一致）时复用上次的根节点，不重新解析；
+        根节点不变，以它为键的bounds缓存和页面索引也继续有效
+        """
+        ui_hash = self.ui_hash(xml)
+        if ui_hash != self.last_ui_hash or self._last_root is None:
+            self._bounds_cache.clear()
+            self._last_root = ET.fromstring(xml, _XML_PARSER)
+            self.last_ui_hash = ui_hash
+        self._cached_root = self._last_root
+        self._cached_root_ts = time.monotonic()
+    
+    def wait_for_ui_change(self, prev_hash: Optional[bytes], interval: float = 0.2,
+                           timeout: float = AD_WAIT_TIMEOUT) -> bool:
+        """轮询UI dump，直到其摘要与prev_hash不同（页面已变化）或超时
+        
+        页面一变化立即返回，不必等满固定时长；变化后的dump直接作为缓存的UI树，
+        随后的get_ui_tree_parsed()不会重复dump
+        
+        Returns:
+            页面是否在超时前发生变化
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            xml = self.get_ui_tree()
+            if self.ui_hash(xml) != prev_hash:
+                self._set_cached_tree(xml)
+                return True
+            if time.monotonic() + interval >= deadline:
+                return False
+            time.sleep(interval)
+    
+    def invalidate_ui_cache(self):
+        """页面可能变化（点击后），下次获取UI树时重新dump
+        
+        bounds缓存随解析结果保留，dump内容未变时继续使用
+        """
+        self._cached_root = None
+    
+    def take_screenshot_bytes(self) -> bytes:
+        """截图并直接返回PNG字节（不经过文件，可用Image.open(io.BytesIO(...))解码）"""
+        # PNG是二进制数据，不走常驻shell（会做换行转换），用exec-out直接输出PNG字节
+        result = subprocess.run(
+            self._adb_cmd("exec-out", "screencap", "-p"),
+            capture_output=True,
             check=True,
             timeout=5
         )
-        # 读取内容
-        with open("/tmp/ui_dump.xml", "r", encoding="utf-8") as f:
-            return f.read()
+        return result.stdout
+    
+    def _read_raw_screencap(self) -> memoryview:
+        """读取screencap的原始帧缓冲（不加-p）到复用的缓冲区，返回有效数据部分的视图
+        
+        帧大小不变时每次都直接读入同一块bytearray，不再为每张截图分配几MB新内存；
+        首次截图或分辨率变化（如旋转）时按实际大小重新分配
+        """
+        proc = subprocess.Popen(self._adb_cmd("exec-out", "screencap"), stdout=subprocess.PIPE, bufsize=0)
+        timer = threading.Timer(5, proc.kill)  # 与其他adb调用一致的5秒超时
+        timer.start()
+        try:
+            view = memoryview(self._shot_buf)
+            size = 0
+            while size < len(view):
+                n = proc.stdout.readinto(view[size:])
+                if not n:
+                    break
+                size += n
+            rest = proc.stdout.read()
+            if rest:
+                # 帧比缓冲区大，按实际大小重新分配（旧缓冲区仍被之前返回的数组引用时不受影响）
+                self._shot_buf = bytearray(view[:size]) + rest
+                size = len(self._shot_buf)
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+            proc.stdout.close()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, proc.args)
+        return memoryview(self._shot_buf)[:size]
+    
+    def take_screenshot_array(self) -> np.ndarray:
+        """截图并返回(H, W, C)的uint8像素数组
+        
+        优先读取screencap的原始帧缓冲，省去设备端PNG编码和本地PNG解码；
+        像素格式不是每像素4字节（RGBA_8888/RGBX_8888）时退回PNG截图。
+        原始帧的数组直接引用复用的缓冲区，只在下次截图前有效，需要保留时应copy()
+        """
+        raw = self._read_raw_screencap()
+        if len(raw) >= 12:
+            width, height, pixel_format = struct.unpack_from("<III", raw)
+            # 头部为12字节，Android 8起多一个4字节的colorspace字段
+            header_size = len(raw) - width * height * 4
+            if pixel_format in (1, 2) and header_size in (12, 16):
+                return np.frombuffer(raw, dtype=np.uint8, offset=header_size).reshape(height, width, 4)
+        return np.asarray(Image.open(io.BytesIO(self.take_screenshot_bytes())))
     
     def take_screenshot(self, output_path: Path):
         """截图并保存到指定路径"""
-        # 截图到设备
-        subprocess.run(
-            self._adb_cmd("shell", "screencap", "-p", "/sdcard/screenshot.png"),
-            check=True,
-            timeout=5
-        )
-        # 拉取到本地
-        subprocess.run(
-            self._adb_cmd("pull", "/sdcard/screenshot.png", str(output_path)),
-            check=True,
-            timeout=5
-        )
+        output_path.write_bytes(self.take_screenshot_bytes())
         print(f"  ✓ 截图已保存: {output_path}")
     
     def tap(self, x: int, y: int):
         """点击指定坐标"""
-        print(f"  📍 ADB点击坐标: ({x}, {y})")
+        logger.debug("  📍 ADB点击坐标: (%s, %s)", x, y)
         # 确保坐标是整数
         x, y = int(x), int(y)
-        result = subprocess.run(
-            self._adb_cmd("shell", "input", "tap", str(x), str(y)),
-            capture_output=True,
-            text=True,
-            timeout=2
-        )
-        if result.returncode != 0:
-            print(f"  ⚠️  ADB点击失败: {result.stderr}")
+        self.invalidate_ui_cache()
+        returncode, output = self._shell_exec(f"input tap {x} {y}", timeout=2)
+        if returncode != 0:
+            print(f"  ⚠️  ADB点击失败: {output.decode(errors='replace')}")
         else:
-            print(f"  ✓ ADB点击命令执行成功")
+            logger.debug("  ✓ ADB点击命令执行成功")
         time.sleep(0.5)  # 点击后短暂等待
     
     def get_element_bounds(self, element) -> Optional[Tuple[int, int, int, int]]:
-        """从UI元素获取边界坐标"""
-        bounds = element.get("bounds")
-        if not bounds:
-            return None
-        # 格式: "[x1,y1][x2,y2]"
+        """从UI元素获取边界坐标（同一元素只解析一次）"""
         try:
-            # 先按"]["分割，得到两个坐标字符串
-            parts = bounds.split("][")
-            if len(parts) != 2:
-                return None
-            # 去掉第一个的"["和第二个的"]"
-            coord1 = parts[0].replace("[", "")
-            coord2 = parts[1].replace("]", "")
-            x1, y1 = map(int, coord1.split(","))
-            x2, y2 = map(int, coord2.split(","))
-            return (x1, y1, x2, y2)
-        except Exception as e:
-            return None
+            return self._bounds_cache[element]
+        except KeyError:
+            pass
+        # 格式: "[x1,y1][x2,y2]"，用split切分比正则匹配更快
+        bounds_str = element.get("bounds", "")
+        bounds = None
+        if bounds_str[:1] == "[" and bounds_str[-1:] == "]":
+            try:
+                left, right = bounds_str[1:-1].split("][")
+                x1, y1 = left.split(",")
+                x2, y2 = right.split(",")
+                bounds = (int(x1), int(y1), int(x2), int(y2))
+            except ValueError:
+                pass
+        self._bounds_cache[element] = bounds
+        return bounds
     
     def get_center(self, bounds: Tuple[int, int, int, int]) -> Tuple[int, int]:
         """获取边界中心点坐标"""
@@ -152,44 +458,84 @@ class QuestionCapture:
         self.current_part = None  # 当前Part: "A", "B", "C"
         self.part_question_id = {}  # 每个Part的题目编号: {"A": 0, "B": 0, "C": 0}
         self.total_question_id = 0  # 总题目编号（跨Part）
+        self._part_total = 0  # sum(part_question_id.values())，经_set_part_count增量维护
+        self._page_index_root = None  # _page_index对应的UI树根节点
+        self._page_index = []  # 当前页面可点击元素的索引，见_index_page
+        self._text_index_root = None  # _text_index对应的UI树根节点
+        self._text_index = []  # 当前页面带文本元素的索引，见_index_text
+        self._bounds_index_root = None  # _bounds_index对应的UI树根节点
+        self._bounds_index = None  # 当前页面带bounds元素的列式索引，见_index_bounds
+        self._root_memo_root = None  # _root_memo_results对应的UI树根节点
+        self._root_memo_results = {}  # 当前页面上各查找方法的结果，见_root_memo
+        # 截图与UI dump互不依赖，截图放到后台线程与dump/本地处理并行；
+        # 只开2个线程，避免同时占用过多USB通道
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="adb-io")
+        # 图片裁剪和PNG编码只占CPU（Pillow编码时释放GIL），单独一个常驻线程池，每道题复用
+        self._crop_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="crop")
+        self._progress_dirty = False  # 是否有尚未写入文件的进度更新
+        self._last_progress_write = 0.0  # 上次写入进度文件的时间（time.monotonic）
+        self._last_saved_digest: Optional[bytes] = None  # 上一道已保存题目的内容摘要
         self.load_progress()
+        # 进程退出（包括异常退出）时写入尚未保存的进度
+        atexit.register(self.flush_progress)
+    
+    def close(self):
+        """写入未保存的进度，释放后台线程和adb shell"""
+        self.flush_progress()
+        self._io_pool.shutdown(wait=True)
+        self._crop_pool.shutdown(wait=True)
+        self.adb.close()
     
     def load_progress(self):
         """加载进度"""
         if PROGRESS_FILE.exists():
-            with open(PROGRESS_FILE, "r", encoding="utf-8") as f:
-                progress = json.load(f)
-                # 兼容旧格式
-                if "last_question_id" in progress:
-                    # 旧格式，重置
-                    self.current_part = None
-                    self.part_question_id = {"A": 0, "B": 0, "C": 0}
-                    self.total_question_id = progress.get("last_question_id", 0)
-                    print(f"📂 检测到旧格式进度文件，已重置")
+            if ORJSON_AVAILABLE:
+                progress = orjson.loads(PROGRESS_FILE.read_bytes())
+            else:
+                progress = json.loads(PROGRESS_FILE.read_text(encoding="utf-8"))
+            # 兼容旧格式
+            if "last_question_id" in progress:
+                # 旧格式，重置
+                self.current_part = None
+                self.part_question_id = {"A": 0, "B": 0, "C": 0}
+                self.total_question_id = progress.get("last_question_id", 0)
+                print(f"📂 检测到旧格式进度文件，已重置")
+            else:
+                self.current_part = progress.get("current_part")
+                self.part_question_id = progress.get("part_question_id", {})
+                self.total_question_id = progress.get("total_question_id", 0)
+                if self.current_part:
+                    print(f"📂 加载进度: 当前Part = {self.current_part}, Part题目ID = {self.part_question_id.get(self.current_part, 0)}, 总题目ID = {self.total_question_id}")
                 else:
-                    self.current_part = progress.get("current_part")
-                    self.part_question_id = progress.get("part_question_id", {})
-                    self.total_question_id = progress.get("total_question_id", 0)
-                    if self.current_part:
-                        print(f"📂 加载进度: 当前Part = {self.current_part}, Part题目ID = {self.part_question_id.get(self.current_part, 0)}, 总题目ID = {self.total_question_id}")
-                    else:
-                        print(f"📂 加载进度: 总题目ID = {self.total_question_id}")
+                    print(f"📂 加载进度: 总题目ID = {self.total_question_id}")
         else:
             self.current_part = None
             self.part_question_id = {"A": 0, "B": 0, "C": 0}
             self.total_question_id = 0
             print("📂 开始新的采集任务")
+        self._part_total = sum(self.part_question_id.values())
     
     def save_progress(self):
-        """保存进度"""
+        """立即保存进度"""
         progress = {
             "current_part": self.current_part,
             "part_question_id": self.part_question_id,
-            "total_question_id": self.total_question_id,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            "total_question_id": self.total_question_id
         }
-        with open(PROGRESS_FILE, "w", encoding="utf-8") as f:
-            json.dump(progress, f, indent=2, ensure_ascii=False)
+        _write_json_atomic(PROGRESS_FILE, progress)
+        self._progress_dirty = False
+        self._last_progress_write = time.monotonic()
+    
+    def _mark_progress_dirty(self):
+        """记录进度已变化；距上次写入超过PROGRESS_SAVE_INTERVAL秒才真正写文件"""
+        self._progress_dirty = True
+        if time.monotonic() - self._last_progress_write >= PROGRESS_SAVE_INTERVAL:
+            self.save_progress()
+    
+    def flush_progress(self):
+        """写入尚未保存的进度更新"""
+        if self._progress_dirty:
+            self.save_progress()
     
     def get_current_question_id(self) -> int:
         """获取当前Part的题目编号"""
@@ -197,126 +543,165 @@ class QuestionCapture:
             return self.part_question_id.get(self.current_part, 0)
         return 0
     
+    def _set_part_count(self, part: str, count: int):
+        """设置某个Part的题目编号，同时增量更新各Part编号之和（_part_total），不必每次重新求和"""
+        self._part_total += count - self.part_question_id.get(part, 0)
+        self.part_question_id[part] = count
+    
     def increment_question_id(self):
         """增加题目编号"""
         if self.current_part:
-            self.part_question_id[self.current_part] = self.part_question_id.get(self.current_part, 0) + 1
+            self._set_part_count(self.current_part, self.part_question_id.get(self.current_part, 0) + 1)
         self.total_question_id += 1
     
+    def _index_page(self, root) -> List[tuple]:
+        """为页面中带bounds的可点击元素建立索引，同一UI树只建立一次（取自_index_bounds）
+        
+        Returns:
+            [(elem, x1, y1, x2, y2, content_desc, text, combined_lower), ...]
+            content_desc/text已去除首尾空白，combined_lower为二者以空格拼接后的小写形式；
+            按文档顺序排列
+        """
+        if root is not self._page_index_root:
+            elems, bounds, content_descs, texts, clickables = self._index_bounds(root)
+            index = []
+            for i in np.flatnonzero(clickables).tolist():
+                content_desc = content_descs[i]
+                text = texts[i]
+                index.append((elems[i], *bounds[i].tolist(), content_desc, text, (content_desc + " " + text).lower()))
+            self._page_index = index
+            self._page_index_root = root
+        return self._page_index
+    
+    def _index_bounds(self, root) -> Tuple[list, np.ndarray, List[str], List[str], np.ndarray]:
+        """为页面中所有带bounds的元素建立列式索引（SoA），同一UI树只建立一次
+        
+        这是对UI树唯一一次带bounds解析的完整遍历，其他按位置筛选的索引和查找都从这里取数据
+        
+        Returns:
+            (elems, bounds, content_descs, texts, clickables)
+            bounds为(N, 4)的int32数组，clickables为(N,)的bool数组，其余为等长列表，
+            同一下标对应同一元素；文本已去除首尾空白；按文档顺序排列
+        """
+        if root is not self._bounds_index_root:
+            elems, coords, content_descs, texts, clickables = [], [], [], [], []
+            for elem in _XP_HAS_BOUNDS(root):
+                bounds = self.adb.get_element_bounds(elem)
+                if not bounds:
+                    continue
+                elems.append(elem)
+                coords.append(bounds)
+                content_descs.append(elem.get("content-desc", "").strip())
+                texts.append(elem.get("text", "").strip())
+                clickables.append(elem.get("clickable") == "true")
+            self._bounds_index = (elems, np.array(coords, dtype=np.int32).reshape(-1, 4),
+                                  content_descs, texts, np.array(clickables, dtype=bool))
+            self._bounds_index_root = root
+        return self._bounds_index
+    
+    def _root_memo(self, root) -> dict:
+        """返回root对应的查找结果缓存（方法名 -> 结果），换了UI树时清空
+        
+        find_options/find_next_button/has_ad在一次采集中会对同一棵树反复调用，结果只计算一次
+        """
+        if root is not self._root_memo_root:
+            self._root_memo_results = {}
+            self._root_memo_root = root
+        return self._root_memo_results
+    
+    def _index_text(self, root) -> List[tuple]:
+        """为页面中text或content-desc非空的元素建立索引，同一UI树只建立一次
+        
+        Returns:
+            [(elem, text, content_desc, text_lower, content_desc_lower), ...]
+            文本已去除首尾空白；按文档顺序排列
+        """
+        if root is not self._text_index_root:
+            index = []
+            for elem in _XP_NODES(root):
+                text_attr = elem.get("text", "").strip()
+                content_desc = elem.get("content-desc", "").strip()
+                if text_attr or content_desc:
+                    index.append((elem, text_attr, content_desc, text_attr.lower(), content_desc.lower()))
+            self._text_index = index
+            self._text_index_root = root
+        return self._text_index
+    
+    def _search_text(self, root, pattern: re.Pattern):
+        """依次产出text或content-desc（小写）命中pattern的索引项"""
+        for item in self._index_text(root):
+            if pattern.search(item[3]) or pattern.search(item[4]):
+                yield item
+    
     def find_elements_by_text(self, root, text: str, partial: bool = False) -> List:
         """根据文本查找元素"""
-        results = []
-        for elem in root.iter():
-            text_attr = elem.get("text", "").strip()
-            content_desc = elem.get("content-desc", "").strip()
-            
-            if partial:
-                if text.lower() in text_attr.lower() or text.lower() in content_desc.lower():
-                    results.append(elem)
-            else:
-                if text_attr == text or content_desc == text:
-                    results.append(elem)
-        return results
+        if partial:
+            text = text.lower()
+            return [elem for elem, _, _, text_lower, desc_lower in self._index_text(root)
+                    if text in text_lower or text in desc_lower]
+        return [elem for elem, text_attr, content_desc, _, _ in self._index_text(root)
+                if text_attr == text or content_desc == text]
     
-    def find_next_button(self, root) -> Optional[ET.Element]:
-        """查找"下一页"按钮"""
-        print("  📝 [find_next_button] 开始查找Next按钮...")
-        next_count = 0
-        # 方法1: 直接遍历所有元素查找Next按钮（更可靠）
-        for elem in root.iter():
-            content_desc = elem.get("content-desc", "").strip()
-            text = elem.get("text", "").strip()
-            combined = (content_desc + " " + text).lower()
-            
-            # 检查是否包含next关键词（精确匹配"next"）
-            if "next" in combined or "下一" in combined:
-                next_count += 1
-                clickable = elem.get("clickable", "false") == "true"
-                bounds = self.adb.get_element_bounds(elem)
-                # 调试信息
-                print(f"  📝 [find_next_button] 找到Next元素 #{next_count}: clickable={clickable}, bounds={bounds}, content-desc='{content_desc}'")
-                if clickable and bounds:
-                    print(f"  ✓ [find_next_button] Next按钮匹配成功，准备返回元素")
-                    print(f"  📝 [find_next_button] 返回元素类型: {type(elem)}, tag: {elem.tag}")
-                    return elem
-                else:
-                    print(f"  ⚠️  [find_next_button] Next元素 #{next_count} 不符合条件: clickable={clickable}, bounds={bounds}")
-        
-        print(f"  📝 [find_next_button] 方法1遍历完成，找到 {next_count} 个Next相关元素，但都不符合条件")
-        
-        # 方法2: 通过文本匹配（备用方法）
-        print("  📝 [find_next_button] 尝试方法2: 文本匹配...")
-        next_texts = ["Next", "next", "下一页", "NEXT", ">", "→"]
-        for text in next_texts:
-            elements = self.find_elements_by_text(root, text, partial=True)
-            if elements:
-                print(f"  📝 [find_next_button] 方法2找到 {len(elements)} 个匹配 '{text}' 的元素")
-                # 优先选择可点击的元素
-                for elem in elements:
-                    if elem.get("clickable", "false") == "true":
-                        bounds = self.adb.get_element_bounds(elem)
-                        if bounds:
-                            print(f"  ✓ [find_next_button] 方法2找到可点击的Next按钮")
-                            return elem
-                # 如果没有可点击的，返回第一个有bounds的
-                for elem in elements:
-                    bounds = self.adb.get_element_bounds(elem)
-                    if bounds:
-                        print(f"  ✓ [find_next_button] 方法2找到有bounds的Next按钮")
-                        return elem
+    def find_next_button(self, root) -> Optional[ET._Element]:
+        """查找"下一页"按钮
         
-        # 方法3: 通过位置查找（底部右侧的按钮通常是Next）
-        print("  📝 [find_next_button] 尝试方法3: 位置查找（底部右侧）...")
-        clickable_elements = []
-        for elem in root.iter():
-            if elem.get("clickable", "false") == "true":
-                bounds = self.adb.get_element_bounds(elem)
-                if bounds:
-                    x1, y1, x2, y2 = bounds
-                    # 检查是否在屏幕底部（Y坐标大于屏幕高度的70%）
-                    # 并且靠右（X坐标大于屏幕宽度的50%）
-                    screen_height = 2848  # 根据设备调整
-                    screen_width = 1276
-                    if y1 > screen_height * 0.7 and x1 > screen_width * 0.5:
-                        content = (elem.get("content-desc", "") + " " + elem.get("text", "")).strip()
-                        clickable_elements.append((y1, x1, elem, content))
-        
-        if clickable_elements:
-            # 按Y坐标和X坐标排序，找到最右下角的按钮
-            clickable_elements.sort(key=lambda x: (x[0], -x[1]), reverse=True)
-            print(f"  📝 [find_next_button] 方法3找到 {len(clickable_elements)} 个底部右侧按钮")
-            print(f"  📝 [find_next_button] 最右下角按钮: Y={clickable_elements[0][0]}, X={clickable_elements[0][1]}, content='{clickable_elements[0][3]}'")
-            return clickable_elements[0][2]  # 返回最右下角的元素
-        
-        print("  ❌ [find_next_button] 所有方法都未找到Next按钮，返回None")
-        return None
+        一次遍历可点击元素并打分，取得分最高者：
+        - 文本含"next"/"下一"：+100
+        - 位于屏幕底部右侧（Y > 70%屏高，X > 50%屏宽）：+50
+        - 文本含箭头符号（">"/"→"）：+10
+        同分时，含next文本的取文档中第一个；其余取最靠下、再最靠左的
+        """
+        memo = self._root_memo(root)
+        if "find_next_button" in memo:
+            return memo["find_next_button"]
+        screen_height = 2848  # 根据设备调整
+        screen_width = 1276
+        best = None
+        best_key = None
+        for elem, x1, y1, x2, y2, _, _, combined in self._index_page(root):
+            score = 0
+            if _NEXT_RE.search(combined):
+                score += 100
+            if y1 > screen_height * 0.7 and x1 > screen_width * 0.5:
+                score += 50
+            if ">" in combined or "→" in combined:
+                score += 10
+            if score == 0:
+                continue
+            key = (score, 0, 0) if score >= 100 else (score, y1, -x1)
+            if best_key is None or key > best_key:
+                best, best_key = elem, key
+        
+        if best is None:
+            logger.debug("  ❌ [find_next_button] 未找到Next按钮，返回None")
+        else:
+            logger.debug("  ✓ [find_next_button] 找到Next按钮: score=%s, content-desc='%s'",
+                         best_key[0], best.get("content-desc", ""))
+        memo["find_next_button"] = best
+        return best
     
     def is_in_home_page(self, root) -> bool:
         """检查是否在首页"""
-        # 查找首页标识：Exercise、Theory Test、KPP Test等
-        home_indicators = ["Exercise", "Theory Test", "KPP Test", "KEJARA System", "Colour Blind Test"]
-        for indicator in home_indicators:
-            elements = self.find_elements_by_text(root, indicator, partial=True)
-            if elements:
-                return True
-        return False
+        # 查找首页标识：Exercise、Theory Test、KPP Test等（见_HOME_RE）
+        return next(self._search_text(root, _HOME_RE), None) is not None
     
     def is_in_language_selection_page(self, root) -> bool:
         """检查是否在语言选择页面"""
-        # 查找语言选择页面的特征：同时存在多个语言选项
-        language_keywords = ["Bahasa Melayu", "English", "中文"]
-        found_count = 0
-        for keyword in language_keywords:
-            elements = self.find_elements_by_text(root, keyword, partial=True)
-            if elements:
-                found_count += 1
-        # 如果找到至少2个语言选项，说明在语言选择页面
-        return found_count >= 2
+        # 查找语言选择页面的特征：同时存在多个语言选项（见_LANGUAGE_RE）
+        found = set()
+        for _, _, _, text_lower, desc_lower in self._index_text(root):
+            found.update(_LANGUAGE_RE.findall(text_lower))
+            found.update(_LANGUAGE_RE.findall(desc_lower))
+            # 如果找到至少2个语言选项，说明在语言选择页面
+            if len(found) >= 2:
+                return True
+        return False
     
-    def select_language(self, language: str = "English") -> bool:
-        """选择语言"""
+    def select_language(self, language: str = "English", root=None) -> bool:
+        """选择语言（root为None时获取当前UI树）"""
         print(f"  🌐 检测到语言选择页面，选择语言: {language}")
-        root = ET.fromstring(self.adb.get_ui_tree())
+        if root is None:
+            root = self.adb.get_ui_tree_parsed()
         
         # 方法1: 通过文本查找
         elements = self.find_elements_by_text(root, language, partial=True)
@@ -351,15 +736,10 @@ class QuestionCapture:
         if language.lower() == "english":
             # 查找所有可点击元素，找到Y坐标在1300-1700之间的（语言选择通常在屏幕中部）
             clickable_elements = []
-            for elem in root.iter():
-                if elem.get("clickable", "false") == "true":
-                    bounds = self.adb.get_element_bounds(elem)
-                    if bounds:
-                        x1, y1, x2, y2 = bounds
-                        if 1300 < y1 < 1700:  # 语言选择区域
-                            content = (elem.get("content-desc", "") + " " + elem.get("text", "")).lower()
-                            if "english" in content or len(content.strip()) < 3:  # English或空内容
-                                clickable_elements.append((y1, elem))
+            for elem, x1, y1, x2, y2, _, _, content in self._index_page(root):
+                if 1300 < y1 < 1700:  # 语言选择区域
+                    if "english" in content or len(content.strip()) < 3:  # English或空内容
+                        clickable_elements.append((y1, elem))
             
             if clickable_elements:
                 # 按Y坐标排序，English通常在中间
@@ -378,22 +758,24 @@ class QuestionCapture:
         
         return False
     
-    def is_in_question_page(self, root) -> bool:
-        """检查是否在题目页面"""
+    def is_in_question_page(self, root=None) -> bool:
+        """检查是否在题目页面（root为None时获取当前UI树）"""
+        if root is None:
+            root = self.adb.get_ui_tree_parsed()
         # 方法1: 查找"下一页"或"Previous"按钮
         next_button = self.find_next_button(root)
-        if next_button:
-            print("  ✓ 检测到Next按钮，确认在题目页面")
+        if next_button is not None:
+            logger.debug("  ✓ 检测到Next按钮，确认在题目页面")
             return True
         
         # 方法2: 检查是否有选项（选项通常在题目页面）
         options = self._find_options_in_page(root)
         if len(options) >= 2:  # 至少2个选项
-            print(f"  ✓ 检测到{len(options)}个选项，确认在题目页面")
+            logger.debug("  ✓ 检测到%d个选项，确认在题目页面", len(options))
             return True
         
         # 方法3: 检查是否有题目编号（如"1/150"）
-        for elem in root.iter():
+        for elem in _XP_SLASH(root):
             content_desc = elem.get("content-desc", "").strip()
             text = elem.get("text", "").strip()
             combined = content_desc + " " + text
@@ -402,13 +784,13 @@ class QuestionCapture:
                 # 检查格式是否像题目编号
                 parts = combined.split("/")
                 if len(parts) == 2 and parts[0].strip().isdigit() and parts[1].strip().isdigit():
-                    print(f"  ✓ 检测到题目编号: {combined.strip()}")
+                    logger.debug("  ✓ 检测到题目编号: %s", combined.strip())
                     return True
         
-        print("  ⚠️  未检测到题目页面特征（Next按钮、选项或题目编号）")
+        logger.debug("  ⚠️  未检测到题目页面特征（Next按钮、选项或题目编号）")
         return False
     
-    def find_exercise_button(self, root) -> Optional[ET.Element]:
+    def find_exercise_button(self, root) -> Optional[ET._Element]:
         """查找Exercise按钮"""
         exercise_keywords = ["Exercise", "练习", "A 部分", "B 部分", "C 部分"]
         for keyword in exercise_keywords:
@@ -426,7 +808,7 @@ class QuestionCapture:
         """展开Exercise部分"""
         print("  🔍 查找Exercise按钮...")
         exercise_btn = self.find_exercise_button(root)
-        if exercise_btn:
+        if exercise_btn is not None:
             bounds = self.adb.get_element_bounds(exercise_btn)
             if bounds:
                 x, y = self.adb.get_center(bounds)
@@ -436,10 +818,11 @@ class QuestionCapture:
                 return True
         return False
     
-    def find_part_buttons(self, root) -> List[ET.Element]:
+    def find_part_buttons(self, root) -> List[ET._Element]:
         """查找Part A/B/C按钮"""
         parts = []
-        for elem in root.iter():
+        # 只检查可点击或可聚焦的元素
+        for elem in _XP_TAPPABLE(root):
             content_desc = elem.get("content-desc", "").strip()
             text = elem.get("text", "").strip()
             
@@ -447,39 +830,26 @@ class QuestionCapture:
             combined_text = (content_desc + " " + text).lower()
             
             # 排除明显的非Part按钮
-            exclude_keywords = ["exercise", "theory", "colour", "blind", "kejara", "tukar", "bahasa", "change", "language", "中文", "english"]
-            if any(keyword in combined_text for keyword in exclude_keywords):
+            if _PART_EXCLUDE_RE.search(combined_text):
                 continue
             
-            # 检查是否包含 "part a"、"part b"、"part c" 等关键词
-            part_keywords = ["part a", "part b", "part c", "a 部分", "b 部分", "c 部分"]
-            matched_keyword = None
-            for keyword in part_keywords:
-                if keyword in combined_text:
-                    matched_keyword = keyword
-                    break
-            
-            # 如果匹配到Part关键词
-            if matched_keyword:
-                # 检查是否有bounds属性且可点击
+            # 如果包含 "part a"、"part b"、"part c" 等关键词
+            if _PART_RE.search(combined_text):
+                # 检查是否有bounds属性
                 bounds = self.adb.get_element_bounds(elem)
-                clickable = elem.get("clickable", "false") == "true"
-                focusable = elem.get("focusable", "false") == "true"
-                if bounds and (clickable or focusable):
+                if bounds:
                     parts.append(elem)
                 else:
                     # 调试信息
-                    if not bounds:
-                        print(f"  ⚠️  Part按钮无bounds: {content_desc}")
-                    elif not clickable and not focusable:
-                        print(f"  ⚠️  Part按钮不可点击: {content_desc} clickable={clickable} focusable={focusable}")
+                    logger.debug("  ⚠️  Part按钮无bounds: %s", content_desc)
         
         return parts
     
-    def enter_part(self, part_name: str = "A") -> bool:
-        """进入指定的Part（A/B/C）"""
+    def enter_part(self, part_name: str = "A", root=None) -> bool:
+        """进入指定的Part（A/B/C）（root为None时获取当前UI树）"""
         print(f"  🔍 查找并进入 Part {part_name}...")
-        root = ET.fromstring(self.adb.get_ui_tree())
+        if root is None:
+            root = self.adb.get_ui_tree_parsed()
         
         # 先检查是否在首页，如果是则先展开Exercise
         if self.is_in_home_page(root):
@@ -489,19 +859,20 @@ class QuestionCapture:
             else:
                 # 重新获取UI树（Exercise已展开）
                 time.sleep(1)
-                root = ET.fromstring(self.adb.get_ui_tree())
+                root = self.adb.get_ui_tree_parsed()
         
         parts = self.find_part_buttons(root)
-        print(f"  📋 找到 {len(parts)} 个可能的Part按钮")
+        logger.debug("  📋 找到 %d 个可能的Part按钮", len(parts))
         
         # 调试：打印所有找到的按钮信息
-        for idx, part in enumerate(parts):
-            content_desc = part.get("content-desc", "").strip()
-            text = part.get("text", "").strip()
-            bounds = self.adb.get_element_bounds(part)
-            if bounds:
-                x, y = self.adb.get_center(bounds)
-                print(f"  [{idx}] content-desc='{content_desc}' text='{text}' 中心=({x}, {y})")
+        if logger.isEnabledFor(logging.DEBUG):
+            for idx, part in enumerate(parts):
+                content_desc = part.get("content-desc", "").strip()
+                text = part.get("text", "").strip()
+                bounds = self.adb.get_element_bounds(part)
+                if bounds:
+                    x, y = self.adb.get_center(bounds)
+                    logger.debug("  [%d] content-desc='%s' text='%s' 中心=(%s, %s)", idx, content_desc, text, x, y)
         
         for part in parts:
             content_desc = part.get("content-desc", "").strip()
@@ -509,7 +880,7 @@ class QuestionCapture:
             combined_text = (content_desc + " " + text).lower()  # 转为小写进行匹配
             
             # 调试：打印所有找到的Part按钮信息
-            print(f"  🔍 检查按钮: content-desc='{content_desc}', text='{text}'")
+            logger.debug("  🔍 检查按钮: content-desc='%s', text='%s'", content_desc, text)
             
             # 大小写忽略的匹配：检查是否包含 "part a"、"part b"、"part c" 等
             part_patterns = [
@@ -523,7 +894,7 @@ class QuestionCapture:
             for pattern in part_patterns:
                 if pattern in combined_text:
                     matched = True
-                    print(f"  ✓ 匹配成功: 模式 '{pattern}' 匹配到 '{content_desc or text}'")
+                    logger.debug("  ✓ 匹配成功: 模式 '%s' 匹配到 '%s'", pattern, content_desc or text)
                     break
             
             if matched:
@@ -531,8 +902,8 @@ class QuestionCapture:
                 if bounds:
                     x, y = self.adb.get_center(bounds)
                     print(f"  🎯 准备点击 Part {part_name}: ({x}, {y}) - '{content_desc or text}'")
-                    print(f"  📐 按钮边界: {bounds}")
-                    print(f"  ⚠️  验证: Part A应该在Y=1820左右，切换语言在Y=970左右")
+                    logger.debug("  📐 按钮边界: %s", bounds)
+                    logger.debug("  ⚠️  验证: Part A应该在Y=1820左右，切换语言在Y=970左右")
                     if y < 1000:
                         print(f"  ❌ 警告: Y坐标{y}太小，可能是切换语言按钮！跳过此按钮")
                         continue
@@ -547,87 +918,114 @@ class QuestionCapture:
             print(f"  找到的按钮: {[p.get('content-desc', p.get('text', '')) for p in parts[:3]]}")
         return False
     
-    def _find_options_in_page(self, root) -> List[ET.Element]:
+    def _find_options_in_page(self, root) -> List[ET._Element]:
         """在页面中查找选项按钮（内部方法）"""
         options = []
         # 查找所有可点击的元素，可能是选项
-        for elem in root.iter():
-            if elem.get("clickable", "false") == "true":
-                text = elem.get("text", "").strip()
-                content_desc = elem.get("content-desc", "").strip()
-                # 选项通常包含字母或数字标签，或者有较长的文本
-                if text and (len(text) > 5 or any(c.isalpha() for c in text[:2])):
-                    bounds = self.adb.get_element_bounds(elem)
-                    if bounds:
-                        # 检查是否在屏幕中下部（选项通常在题目下方）
-                        _, y1, _, y2 = bounds
-                        if y1 > 200:  # 假设题目区域在上方
-                            options.append(elem)
-                elif content_desc and len(content_desc) > 10:  # content-desc也可能包含选项文本
-                    bounds = self.adb.get_element_bounds(elem)
-                    if bounds:
-                        _, y1, _, y2 = bounds
-                        if y1 > 200:
-                            options.append(elem)
+        for elem, _, y1, _, _, content_desc, text, _ in self._index_page(root):
+            # 检查是否在屏幕中下部（选项通常在题目下方）
+            if y1 <= 200:  # 假设题目区域在上方
+                continue
+            # 选项通常包含字母或数字标签，或者有较长的文本
+            if text and (len(text) > 5 or any(c.isalpha() for c in text[:2])):
+                options.append(elem)
+            elif content_desc and len(content_desc) > 10:  # content-desc也可能包含选项文本
+                options.append(elem)
         
-        # 按Y坐标排序（从上到下）
-        options.sort(key=lambda e: self.adb.get_element_bounds(e)[1] if self.adb.get_element_bounds(e) else 0)
+        # 按Y坐标排序（从上到下；加入列表的元素都有bounds）
+        options.sort(key=lambda e: self.adb.get_element_bounds(e)[1])
         return options[:4]  # 最多4个选项
     
-    def find_options(self, root) -> List[ET.Element]:
-        """查找选项按钮"""
+    def find_options(self, root) -> List[ET._Element]:
+        """查找选项按钮（返回新列表，调用方可以修改）"""
+        memo = self._root_memo(root)
+        if "find_options" in memo:
+            return list(memo["find_options"])
         options = []
         # 使用uiautomator更准确地查找选项
-        for elem in root.iter():
-            # 选项通常是可点击的，有bounds，在屏幕中下部
-            if elem.get("clickable", "false") == "true":
-                bounds = self.adb.get_element_bounds(elem)
-                if bounds:
-                    x1, y1, x2, y2 = bounds
-                    content_desc = elem.get("content-desc", "").strip()
-                    text = elem.get("text", "").strip()
-                    combined_text = (content_desc + " " + text).lower()
-                    
-                    # 排除明显的非选项元素
-                    exclude_keywords = [
-                        "next", "previous", "上一", "下一", "back", "返回",
-                        "tukar", "bahasa", "change", "language", "切换", "语言",
-                        "exercise", "part", "theory", "colour", "blind", "kejara"
-                    ]
-                    if any(keyword in combined_text for keyword in exclude_keywords):
-                        continue
-                    
-                    # 选项通常在题目下方，Y坐标在800-2500之间（排除顶部和底部导航）
-                    # 宽度通常较大（选项按钮比较宽，通常占屏幕宽度的60%以上）
-                    screen_width = 1276  # 根据设备调整
-                    if 800 < y1 < 2500 and (x2 - x1) > screen_width * 0.5:
-                        options.append(elem)
+        screen_width = 1276  # 根据设备调整
+        # 选项通常是可点击的，有bounds，在屏幕中下部
+        for elem, x1, y1, x2, y2, _, _, combined_text in self._index_page(root):
+            # 选项通常在题目下方，Y坐标在800-2500之间（排除顶部和底部导航）
+            # 宽度通常较大（选项按钮比较宽，通常占屏幕宽度的60%以上）
+            if not (800 < y1 < 2500 and (x2 - x1) > screen_width * 0.5):
+                continue
+            # 排除明显的非选项元素
+            if _OPTION_EXCLUDE_RE.search(combined_text):
+                continue
+            options.append(elem)
         
-        # 按Y坐标排序（从上到下）
-        options.sort(key=lambda e: self.adb.get_element_bounds(e)[1] if self.adb.get_element_bounds(e) else 0)
+        # 按Y坐标排序（从上到下；加入列表的元素都有bounds）
+        options.sort(key=lambda e: self.adb.get_element_bounds(e)[1])
         # 通常有2-4个选项
+        memo["find_options"] = options[:4]
         return options[:4]
     
-    def find_image_elements(self, root) -> List[ET.Element]:
+    def _question_digest(self, root, question_text: str, question_num: Optional[int]) -> bytes:
+        """页面题目编号+题目文本+选项文本的BLAKE2b摘要，用于识别仍停留在同一道题的页面
+        
+        只取文本内容，选项点击后的颜色/选中状态变化不影响摘要；
+        计入题目编号，题干相同、选项只有图片的不同题目不会得到相同摘要
+        """
+        option_texts = sorted(
+            (elem.get("content-desc", "") + "\x1f" + elem.get("text", "")).encode()
+            for elem in self.find_options(root)
+        )
+        number = b"" if question_num is None else str(question_num).encode()
+        return hashlib.blake2b(b"|".join([number, question_text.encode(), *option_texts]), digest_size=16).digest()
+    
+    def _skip_to_next_question(self, root) -> bool:
+        """不采集当前题目，直接进入下一题：先点击第一个选项启用Next按钮，再点击Next
+        
+        Returns:
+            是否点击了Next按钮（未找到时返回False，可能已到最后一题）
+        """
+        # 需要先点击选项才能点击Next按钮
+        options = self.find_options(root)
+        if options:
+            # 点击第一个选项
+            first_option = options[0]
+            bounds = self.adb.get_element_bounds(first_option)
+            if bounds:
+                x, y = self.adb.get_center(bounds)
+                print(f"  🎯 点击选项以启用Next按钮: ({x}, {y})")
+                self.adb.tap(x, y)
+                time.sleep(1)  # 短暂等待
+                # 重新获取UI树
+                root = self.adb.get_ui_tree_parsed()
+        
+        # 点击Next按钮进入下一题
+        next_button = self.find_next_button(root)
+        if next_button is not None:
+            bounds = self.adb.get_element_bounds(next_button)
+            if bounds:
+                x, y = self.adb.get_center(bounds)
+                print(f"  🎯 点击'下一页'跳过: ({x}, {y})")
+                prev_hash = self.adb.last_ui_hash
+                self.adb.tap(x, y)
+                # 页面一变化就继续，最多等待WAIT_TIME_PAGE_UPDATE秒
+                self.adb.wait_for_ui_change(prev_hash, timeout=WAIT_TIME_PAGE_UPDATE)
+                return True
+        return False
+    
+    def find_image_elements(self, root) -> List[ET._Element]:
         """查找页面中的ImageView元素（图标/图片）"""
         images = []
-        for elem in root.iter():
-            # 查找ImageView类型的元素
-            if elem.get("class", "").endswith("ImageView"):
-                bounds = self.adb.get_element_bounds(elem)
-                if bounds:
-                    x1, y1, x2, y2 = bounds
-                    # 过滤掉太小的元素（可能是装饰性图标）
-                    width = x2 - x1
-                    height = y2 - y1
-                    if width > 50 and height > 50:  # 至少50x50像素
-                        images.append(elem)
+        for elem in _XP_IMAGEVIEW(root):
+            bounds = self.adb.get_element_bounds(elem)
+            if bounds:
+                x1, y1, x2, y2 = bounds
+                # 过滤掉太小的元素（可能是装饰性图标）
+                width = x2 - x1
+                height = y2 - y1
+                if width > 50 and height > 50:  # 至少50x50像素
+                    images.append(elem)
         
-        # 按Y坐标排序（从上到下）
-        images.sort(key=lambda e: self.adb.get_element_bounds(e)[1] if self.adb.get_element_bounds(e) else 0)
+        # 按Y坐标排序（从上到下；加入列表的元素都有bounds）
+        images.sort(key=lambda e: self.adb.get_element_bounds(e)[1])
         return images
     
-    def categorize_images(self, root, image_elements: List[ET.Element], options: List[ET.Element]) -> Dict[str, List[ET.Element]]:
+    def categorize_images(self, root, image_elements: List[ET._Element], options: List[ET._Element]) -> Dict[str, List[ET._Element]]:
         """将图片分类为题目图片和选项图片
         
         题目图片：出现在题目区域的图片（如交通标志），用于帮助理解题目
@@ -678,77 +1076,110 @@ class QuestionCapture:
             "option_images": option_images
         }
     
-    def has_ad(self, root) -> bool:
-        """检测是否有广告"""
-        ad_keywords = ["关闭", "跳过", "Skip", "Close", "X", "×", "广告", "Ad"]
-        for keyword in ad_keywords:
-            elements = self.find_elements_by_text(root, keyword, partial=True)
-            if elements:
-                # 检查是否在屏幕上方或中央（广告通常在顶部）
-                for elem in elements:
-                    bounds = self.adb.get_element_bounds(elem)
-                    if bounds:
-                        _, y1, _, _ = bounds
-                        content_desc = elem.get("content-desc", "").strip()
-                        text = elem.get("text", "").strip()
-                        combined = (content_desc + " " + text).lower()
-                        # 排除Next按钮（Next可能在底部，但不应被识别为广告）
-                        if "next" in combined or "下一" in combined:
-                            continue
-                        # 广告通常在屏幕上半部分（Y < 500）
-                        if y1 < 500:
-                            return True
+    def has_ad(self, root=None) -> bool:
+        """检测是否有广告（root为None时获取当前UI树）"""
+        if root is None:
+            root = self.adb.get_ui_tree_parsed()
+        memo = self._root_memo(root)
+        if "has_ad" not in memo:
+            memo["has_ad"] = self._has_ad(root)
+        return memo["has_ad"]
+    
+    def _has_ad(self, root) -> bool:
+        """has_ad的实际检测（不使用缓存）"""
+        # 一次遍历匹配所有广告关键词（见_AD_RE）
+        for elem, _, _, text_lower, desc_lower in self._search_text(root, _AD_RE):
+            # 检查是否在屏幕上方或中央（广告通常在顶部）
+            bounds = self.adb.get_element_bounds(elem)
+            if bounds:
+                _, y1, _, _ = bounds
+                combined = desc_lower + " " + text_lower
+                # 排除Next按钮（Next可能在底部，但不应被识别为广告）
+                if _NEXT_RE.search(combined):
+                    continue
+                # 广告通常在屏幕上半部分（Y < 500）
+                if y1 < 500:
+                    return True
         return False
     
     def close_ad(self, root) -> bool:
-        """关闭广告"""
-        close_keywords = ["关闭", "跳过", "Skip", "Close", "X", "×"]
-        for keyword in close_keywords:
-            elements = self.find_elements_by_text(root, keyword, partial=True)
-            for elem in elements:
-                bounds = self.adb.get_element_bounds(elem)
-                if bounds:
-                    x, y = self.adb.get_center(bounds)
-                    content_desc = elem.get("content-desc", "").strip()
-                    text = elem.get("text", "").strip()
-                    combined = (content_desc + " " + text).lower()
-                    # 排除Next按钮
-                    if "next" in combined or "下一" in combined:
-                        continue
-                    # 广告关闭按钮通常在屏幕上半部分
-                    _, y1, _, _ = bounds
-                    if y1 < 500:
-                        print(f"  🎯 尝试关闭广告: 点击 ({x}, {y}) - '{content_desc or text}'")
-                        self.adb.tap(x, y)
-                        time.sleep(2)
-                        return True
-        return False
+        """关闭广告
+        
+        一次遍历找出所有候选关闭按钮，优先点击命中靠前关键词的（见_CLOSE_KEYWORDS），
+        同一关键词取文档中第一个
+        """
+        best = None
+        best_rank = len(_CLOSE_KEYWORDS)
+        for elem, text, content_desc, text_lower, desc_lower in self._search_text(root, _CLOSE_RE):
+            rank = min(_CLOSE_RANK[m] for m in _CLOSE_RE.findall(text_lower) + _CLOSE_RE.findall(desc_lower))
+            if rank >= best_rank:
+                continue
+            bounds = self.adb.get_element_bounds(elem)
+            if not bounds:
+                continue
+            # 排除Next按钮
+            if _NEXT_RE.search(desc_lower + " " + text_lower):
+                continue
+            # 广告关闭按钮通常在屏幕上半部分
+            if bounds[1] < 500:
+                best, best_rank = (elem, bounds, content_desc or text), rank
+        
+        if best is None:
+            return False
+        _, bounds, label = best
+        x, y = self.adb.get_center(bounds)
+        print(f"  🎯 尝试关闭广告: 点击 ({x}, {y}) - '{label}'")
+        self.adb.tap(x, y)
+        time.sleep(2)
+        return True
     
-    def wait_for_ad_close(self, timeout: int = AD_WAIT_TIMEOUT) -> bool:
-        """等待广告关闭"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            root = ET.fromstring(self.adb.get_ui_tree())
-            if not self.has_ad(root):
+    def wait_for_ad_close(self, timeout: int = AD_WAIT_TIMEOUT, root=None) -> bool:
+        """等待广告关闭（传入root时先用它检查，之后每当页面变化时重新检查）"""
+        deadline = time.monotonic() + timeout
+        if root is None:
+            root = self.adb.get_ui_tree_parsed(max_age=0)
+        if not self.has_ad(root):
+            return True
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.adb.wait_for_ui_change(self.adb.last_ui_hash, timeout=remaining):
+                return False
+            if not self.has_ad(self.adb.get_ui_tree_parsed()):
                 return True
-            time.sleep(1)
-        return False
     
-    def compare_screenshots(self, img1_path: Path, img2_path: Path) -> bool:
-        """对比两张截图是否相同（简单哈希对比）"""
-        if not img1_path.exists() or not img2_path.exists():
+    @staticmethod
+    def _dhash(img_path: Path) -> int:
+        """计算64位差值哈希（dHash）：缩成9x8灰度图，比较每行相邻像素的明暗"""
+        with Image.open(img_path) as img:
+            small = img.convert("L").resize((9, 8), Image.Resampling.BOX)
+        pixels = np.asarray(small, dtype=np.int16)
+        bits = np.packbits((pixels[:, 1:] > pixels[:, :-1]).ravel())
+        return int(bits.view(">u8")[0])
+    
+    def compare_screenshots(self, img1_path: Path, img2_path: Path, max_distance: int = 4) -> bool:
+        """对比两张截图是否不同（页面是否已变化）
+        
+        先只看文件大小：相差超过5%直接判定已变化；再逐块比较文件内容，
+        字节相同直接判定未变化；两者都无法判断时才解码用dHash比较，
+        汉明距离不超过max_distance视为同一页面（状态栏时钟等细微变化不会被当作页面更新）
+        """
+        try:
+            size1 = img1_path.stat().st_size
+            size2 = img2_path.stat().st_size
+        except FileNotFoundError:
             return False
-        with open(img1_path, "rb") as f1, open(img2_path, "rb") as f2:
-            hash1 = hashlib.md5(f1.read()).hexdigest()
-            hash2 = hashlib.md5(f2.read()).hexdigest()
-            return hash1 != hash2
+        if abs(size1 - size2) > 0.05 * max(size1, size2):
+            return True
+        if size1 == size2 and filecmp.cmp(img1_path, img2_path, shallow=False):
+            return False
+        distance = bin(self._dhash(img1_path) ^ self._dhash(img2_path)).count("1")
+        return distance > max_distance
     
     def verify_page_update(self) -> bool:
         """验证页面是否更新"""
         try:
             # 获取当前UI树
-            current_tree = self.adb.get_ui_tree()
-            root = ET.fromstring(current_tree)
+            root = self.adb.get_ui_tree_parsed()
             
             # 检查是否有"下一页"按钮（如果页面更新，应该能看到新页面的元素）
             next_button = self.find_next_button(root)
@@ -766,20 +1197,10 @@ class QuestionCapture:
         - 位置：bounds=[252,196][487,276]，Y坐标 < 300
         - 返回当前题目编号（如 19）
         """
-        for elem in root.iter():
-            bounds = self.adb.get_element_bounds(elem)
-            if not bounds:
-                continue
-            
-            x1, y1, x2, y2 = bounds
-            
-            # 题目编号通常在左上角，Y坐标 < 300
-            if y1 >= 300:
-                continue
-            
-            content_desc = elem.get("content-desc", "").strip()
-            text = elem.get("text", "").strip()
-            combined = (content_desc + " " + text).strip()
+        _, bounds, content_descs, texts, _ = self._index_bounds(root)
+        # 题目编号通常在左上角，Y坐标 < 300：先用数组一次筛出顶部元素，只检查这些元素的文本
+        for i in np.flatnonzero(bounds[:, 1] < 300).tolist():
+            combined = (content_descs[i] + " " + texts[i]).strip()
             
             # 检查是否包含 "/" 和数字（如 "19/150"）
             if "/" in combined and any(c.isdigit() for c in combined):
@@ -812,66 +1233,34 @@ class QuestionCapture:
         - 宽度 > 800px
         - content-desc或text属性包含长文本（>50字符）
         """
-        question_candidates = []
-        
-        for elem in root.iter():
+        # XPath在C层先筛出文本足够长的节点（宽松条件的超集），一次遍历同时收集两档候选
+        strict_candidates = []
+        relaxed_candidates = []
+        for elem in _XP_LONG_TEXT(root):
             bounds = self.adb.get_element_bounds(elem)
             if not bounds:
                 continue
             
             x1, y1, x2, y2 = bounds
             width = x2 - x1
-            height = y2 - y1
-            
-            # 检查是否符合题目文本的特征
-            if not (300 < y1 < 1500 and width > 800):
-                continue
-            
-            # 获取文本内容
-            content_desc = elem.get("content-desc", "").strip()
-            text = elem.get("text", "").strip()
             
             # 优先使用content-desc，如果没有则使用text
-            question_text = content_desc if content_desc else text
-            
-            # 检查文本长度（题目文本通常较长）
-            if len(question_text) > 50:
-                question_candidates.append({
-                    "elem": elem,
-                    "text": question_text,
-                    "y": y1,
-                    "width": width
-                })
-        
-        if not question_candidates:
-            # 如果没找到，尝试更宽松的条件
-            for elem in root.iter():
-                bounds = self.adb.get_element_bounds(elem)
-                if not bounds:
-                    continue
-                
-                x1, y1, x2, y2 = bounds
-                width = x2 - x1
-                
-                if not (200 < y1 < 1800 and width > 600):
-                    continue
-                
-                content_desc = elem.get("content-desc", "").strip()
-                text = elem.get("text", "").strip()
-                question_text = content_desc if content_desc else text
-                
-                if len(question_text) > 30:
-                    question_candidates.append({
-                        "elem": elem,
-                        "text": question_text,
-                        "y": y1,
-                        "width": width
-                    })
+            content_desc = elem.get("content-desc", "").strip()
+            question_text = content_desc if content_desc else elem.get("text", "").strip()
+            candidate = {"elem": elem, "text": question_text, "y": y1, "width": width}
+            
+            # 严格条件：Y坐标300-1500、宽度>800、文本>50字符
+            if 300 < y1 < 1500 and width > 800 and len(question_text) > 50:
+                strict_candidates.append(candidate)
+            # 宽松条件：Y坐标200-1800、宽度>600、文本>30字符
+            if 200 < y1 < 1800 and width > 600 and len(question_text) > 30:
+                relaxed_candidates.append(candidate)
         
+        # 严格条件没有结果时才使用宽松条件的候选
+        question_candidates = strict_candidates or relaxed_candidates
         if question_candidates:
-            # 按Y坐标排序，选择最上方的（通常是题目文本）
-            question_candidates.sort(key=lambda x: x["y"])
-            question_text = question_candidates[0]["text"]
+            # 选择最上方的（通常是题目文本）；Y坐标相同时取文档中靠前的
+            question_text = min(question_candidates, key=lambda x: x["y"])["text"]
             
             # 清理文本：去除多余的空格和换行
             question_text = " ".join(question_text.split())
@@ -893,38 +1282,27 @@ class QuestionCapture:
         option_elements = []
         
         # 方法1: 查找明确标记为A/B/C/D的选项按钮
-        for elem in root.iter():
-            if elem.get("clickable", "false") != "true":
-                continue
-            
-            bounds = self.adb.get_element_bounds(elem)
-            if not bounds:
-                continue
-            
-            x1, y1, x2, y2 = bounds
-            
+        for elem, x1, y1, x2, y2, content_desc, text, _ in self._index_page(root):
             # 检查是否在选项区域（Y坐标 1800-2500）
             if not (1800 < y1 < 2500):
                 continue
             
-            content_desc = elem.get("content-desc", "").strip()
-            text = elem.get("text", "").strip()
             combined = (content_desc + " " + text).strip()
             
             # 检查是否是选项标签（A/B/C/D）
             option_label = None
-            if content_desc in ["A", "B", "C", "D"]:
+            if content_desc in _OPTION_LABELS:
                 option_label = content_desc
-            elif text in ["A", "B", "C", "D"]:
+            elif text in _OPTION_LABELS:
                 option_label = text
             else:
-                # 检查是否包含选项标签（如 "A. Stop" 或 "A Stop"）
-                for label in ["A", "B", "C", "D"]:
-                    if (combined.startswith(f"{label}.") or 
-                        combined.startswith(f"{label} ") or
-                        f" {label} " in f" {combined} "):
-                        option_label = label
-                        break
+                # 检查是否包含选项标签（如 "A. Stop" 或 "A Stop"），命中多个时取靠前的标签
+                labels = set(_OPTION_LABEL_WORD_RE.findall(combined))
+                prefix_label = _OPTION_LABEL_PREFIXES.get(combined[:2])
+                if prefix_label:
+                    labels.add(prefix_label)
+                if labels:
+                    option_label = min(labels)
             
             if option_label:
                 option_elements.append({
@@ -939,7 +1317,7 @@ class QuestionCapture:
         if not option_elements:
             found_options = self.find_options(root)
             # 为找到的选项分配标签（按Y坐标从上到下分配A/B/C/D）
-            option_labels = ["A", "B", "C", "D"]
+            option_labels = _OPTION_LABELS
             for idx, elem in enumerate(found_options):
                 if idx < len(option_labels):
                     bounds = self.adb.get_element_bounds(elem)
@@ -971,7 +1349,7 @@ class QuestionCapture:
             # 方法1: 使用content-desc（如果包含选项文本）
             if content_desc and len(content_desc) > 1 and content_desc != label:
                 # 如果content-desc包含选项文本（如 "A. Stop"），提取文本部分
-                if content_desc.startswith(f"{label}.") or content_desc.startswith(f"{label} "):
+                if _OPTION_LABEL_PREFIXES.get(content_desc[:2]) == label:
                     option_text = content_desc[len(label):].lstrip(". ").strip()
                 elif content_desc == label:
                     # 如果content-desc就是标签，跳过
@@ -981,29 +1359,27 @@ class QuestionCapture:
             
             # 方法2: 使用text属性
             if not option_text and text and text != label:
-                if text.startswith(f"{label}.") or text.startswith(f"{label} "):
+                if _OPTION_LABEL_PREFIXES.get(text[:2]) == label:
                     option_text = text[len(label):].lstrip(". ").strip()
                 else:
                     option_text = text
             
             # 方法3: 查找选项元素内的子元素获取文本
             if not option_text:
-                for child in elem.iter():
-                    if child == elem:
-                        continue
+                for child in _XP_NODES(elem):
                     child_text = child.get("text", "").strip()
                     child_content_desc = child.get("content-desc", "").strip()
                     # 排除标签本身和太短的文本
                     if child_text and child_text != label and len(child_text) > 1:
                         # 如果子元素文本包含标签，提取文本部分
-                        if child_text.startswith(f"{label}.") or child_text.startswith(f"{label} "):
+                        if _OPTION_LABEL_PREFIXES.get(child_text[:2]) == label:
                             option_text = child_text[len(label):].lstrip(". ").strip()
                         else:
                             option_text = child_text
                         if option_text:
                             break
                     elif child_content_desc and child_content_desc != label and len(child_content_desc) > 1:
-                        if child_content_desc.startswith(f"{label}.") or child_content_desc.startswith(f"{label} "):
+                        if _OPTION_LABEL_PREFIXES.get(child_content_desc[:2]) == label:
                             option_text = child_content_desc[len(label):].lstrip(". ").strip()
                         else:
                             option_text = child_content_desc
@@ -1014,7 +1390,7 @@ class QuestionCapture:
             if not option_text:
                 parent = elem.getparent()
                 if parent is not None:
-                    for sibling in parent.iter():
+                    for sibling in _XP_SELF_AND_NODES(parent):
                         if sibling == elem:
                             continue
                         sibling_text = sibling.get("text", "").strip()
@@ -1044,68 +1420,69 @@ class QuestionCapture:
         
         return options
     
-    def check_option_background_color(self, option, screenshot_path: Path) -> Tuple[bool, bool, Tuple[int, int, int]]:
-        """检查选项的背景颜色
+    def check_option_background_color(self, option, img: np.ndarray) -> Tuple[bool, bool, Tuple[int, int, int]]:
+        """检查单个选项的背景颜色，见check_options_background_color"""
+        return self.check_options_background_color([option], img)[0]
+    
+    def check_options_background_color(self, options: List[ET._Element],
+                                       img: np.ndarray) -> List[Tuple[bool, bool, Tuple[int, int, int]]]:
+        """检查一组选项的背景颜色
+        
+        每个选项取中心20x20像素区域的平均颜色，绿色/红色判断对所有选项一次性按数组计算
+        
+        Args:
+            options: 选项元素列表
+            img: 截图像素数组（H, W, C），见ADBController.take_screenshot_array
         
         Returns:
-            (is_green, is_red, rgb): 是否为绿色、是否为红色、RGB值
+            与options一一对应的[(is_green, is_red, rgb), ...]：是否为绿色、是否为红色、RGB值
         """
+        results = [(False, False, (0, 0, 0))] * len(options)
         try:
-            bounds = self.adb.get_element_bounds(option)
-            if not bounds:
-                return False, False, (0, 0, 0)
-            
-            img = Image.open(screenshot_path)
-            x1, y1, x2, y2 = bounds
-            
-            # 确保坐标在图片范围内
-            img_width, img_height = img.size
-            x1 = max(0, min(x1, img_width - 1))
-            y1 = max(0, min(y1, img_height - 1))
-            x2 = max(x1 + 1, min(x2, img_width))
-            y2 = max(y1 + 1, min(y2, img_height))
-            
-            # 提取选项区域中心点的颜色（取中心区域的平均颜色）
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-            
-            # 取中心区域的小块（20x20像素）来计算平均颜色
-            sample_size = 20
-            x_start = max(0, center_x - sample_size // 2)
-            y_start = max(0, center_y - sample_size // 2)
-            x_end = min(img_width, center_x + sample_size // 2)
-            y_end = min(img_height, center_y + sample_size // 2)
-            
-            # 计算平均RGB值
-            total_r, total_g, total_b = 0, 0, 0
-            pixel_count = 0
-            
-            for x in range(x_start, x_end):
-                for y in range(y_start, y_end):
-                    pixel = img.getpixel((x, y))
-                    if len(pixel) >= 3:  # RGB或RGBA
-                        total_r += pixel[0]
-                        total_g += pixel[1]
-                        total_b += pixel[2]
-                        pixel_count += 1
-            
-            if pixel_count > 0:
-                avg_r = total_r // pixel_count
-                avg_g = total_g // pixel_count
-                avg_b = total_b // pixel_count
+            if img.ndim != 3 or img.shape[2] < 3:  # 只处理RGB或RGBA
+                return results
+            img_height, img_width = img.shape[:2]
+            
+            indices = []  # 成功取样的选项下标
+            averages = []  # 对应的平均RGB值
+            for i, option in enumerate(options):
+                bounds = self.adb.get_element_bounds(option)
+                if not bounds:
+                    continue
                 
-                # 判断颜色：绿色（正确答案）或红色（错误答案）
-                is_green = (avg_g > avg_r + 20 and avg_g > avg_b + 20 and avg_g > 80) or \
-                          (avg_g > 150 and avg_g > avg_r and avg_g > avg_b)
-                is_red = (avg_r > avg_g + 20 and avg_r > avg_b + 20 and avg_r > 80) or \
-                        (avg_r > 150 and avg_r > avg_g and avg_r > avg_b)
+                # 确保坐标在图片范围内
+                x1, y1, x2, y2 = bounds
+                x1 = max(0, min(x1, img_width - 1))
+                y1 = max(0, min(y1, img_height - 1))
+                x2 = max(x1 + 1, min(x2, img_width))
+                y2 = max(y1 + 1, min(y2, img_height))
                 
-                return is_green, is_red, (avg_r, avg_g, avg_b)
-            
-            return False, False, (0, 0, 0)
+                # 取选项中心的小块（20x20像素）来计算平均颜色
+                center_x = (x1 + x2) // 2
+                center_y = (y1 + y2) // 2
+                sample_size = 20
+                x_start = max(0, center_x - sample_size // 2)
+                y_start = max(0, center_y - sample_size // 2)
+                x_end = min(img_width, center_x + sample_size // 2)
+                y_end = min(img_height, center_y + sample_size // 2)
+                
+                region = img[y_start:y_end, x_start:x_end, :3]
+                pixel_count = region.shape[0] * region.shape[1]
+                if pixel_count > 0:
+                    indices.append(i)
+                    averages.append(region.sum(axis=(0, 1), dtype=np.int64) // pixel_count)
+            
+            if indices:
+                rgb = np.array(averages)
+                r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+                # 判断颜色：绿色（正确答案）或红色（错误答案）
+                is_green = ((g > r + 20) & (g > b + 20) & (g > 80)) | ((g > 150) & (g > r) & (g > b))
+                is_red = ((r > g + 20) & (r > b + 20) & (r > 80)) | ((r > 150) & (r > g) & (r > b))
+                for k, i in enumerate(indices):
+                    results[i] = (bool(is_green[k]), bool(is_red[k]), tuple(rgb[k].tolist()))
         except Exception as e:
             print(f"  ⚠️  检查选项背景颜色失败: {e}")
-            return False, False, (0, 0, 0)
+        return results
     
     def get_option_label(self, option, options_list) -> Optional[str]:
         """获取选项的标签（A/B/C/D）"""
@@ -1113,22 +1490,22 @@ class QuestionCapture:
         text = option.get("text", "").strip()
         
         # 提取选项标签（A/B/C/D）
-        if content_desc in ["A", "B", "C", "D"]:
+        if content_desc in _OPTION_LABELS:
             return content_desc
-        elif text in ["A", "B", "C", "D"]:
+        elif text in _OPTION_LABELS:
             return text
         else:
             # 尝试从文本中提取标签
             combined = (content_desc + " " + text).strip()
-            for label in ["A", "B", "C", "D"]:
-                if combined.startswith(f"{label}.") or combined.startswith(f"{label} "):
-                    return label
+            label = _OPTION_LABEL_PREFIXES.get(combined[:2])
+            if label:
+                return label
             
             # 如果还是没找到，通过选项在列表中的位置来确定标签
             try:
                 option_idx = options_list.index(option)
                 if option_idx < 4:
-                    return ["A", "B", "C", "D"][option_idx]
+                    return _OPTION_LABELS[option_idx]
             except ValueError:
                 pass
         
@@ -1148,30 +1525,11 @@ class QuestionCapture:
             return None
         
         try:
-            # 临时截图用于颜色检测
-            temp_screenshot_path = Path("/tmp/temp_answer_detect.png")
-            self.adb.take_screenshot(temp_screenshot_path)
-            
-            if not temp_screenshot_path.exists():
-                return None
-            
-            # 检查每个选项的背景颜色
-            for option in options:
-                is_green, is_red, rgb = self.check_option_background_color(option, temp_screenshot_path)
-                
-                if is_green:
-                    # 找到正确答案
-                    answer = self.get_option_label(option, options)
-                    if answer:
-                        # 删除临时截图
-                        if temp_screenshot_path.exists():
-                            temp_screenshot_path.unlink()
-                        print(f"  ✓ 通过颜色识别找到正确答案: {answer} (绿色背景, RGB={rgb})")
-                        return answer
-            
-            # 删除临时截图
-            if temp_screenshot_path.exists():
-                temp_screenshot_path.unlink()
+            # 截图直接取像素数组（不落盘），检查每个选项的背景颜色
+            answer, rgb = self._find_green_option(options, self.adb.take_screenshot_array())
+            if answer:
+                print(f"  ✓ 通过颜色识别找到正确答案: {answer} (绿色背景, RGB={rgb})")
+                return answer
             
             # 没有找到绿色背景
             print("  ⚠️  未检测到绿色背景，需要触发选项点击")
@@ -1181,6 +1539,20 @@ class QuestionCapture:
             print(f"  ⚠️  颜色识别失败: {e}")
             return None
     
+    def _find_green_option(self, options: List[ET._Element],
+                           img: np.ndarray) -> Tuple[Optional[str], Optional[Tuple[int, int, int]]]:
+        """在截图中查找绿色背景（正确答案）的选项
+        
+        Returns:
+            (label, rgb): 第一个绿色且能确定标签的选项的标签和RGB值，没有时为(None, None)
+        """
+        for option, (is_green, is_red, rgb) in zip(options, self.check_options_background_color(options, img)):
+            if is_green:
+                answer = self.get_option_label(option, options)
+                if answer:
+                    return answer, rgb
+        return None, None
+    
     def detect_correct_answer_by_clicking_options(self, root) -> Optional[str]:
         """通过依次点击选项来检测正确答案
         
@@ -1206,41 +1578,32 @@ class QuestionCapture:
             # 等待颜色反馈显示
             time.sleep(WAIT_TIME_AFTER_CLICK)
             
-            # 重新获取UI树和截图
-            root_after_click = ET.fromstring(self.adb.get_ui_tree())
-            options_after_click = self.find_options(root_after_click)
+            # 点击通常只改变选项颜色、不改变布局：先只截图，用点击前的选项位置检查是否有绿色背景
+            try:
+                img = self.adb.take_screenshot_array()
+            except OSError as e:
+                print(f"  ⚠️  读取截图失败: {e}")
+                continue
+            answer, rgb = self._find_green_option(options, img)
             
-            # 检查是否有绿色背景
-            temp_screenshot_path = Path("/tmp/temp_answer_detect_click.png")
-            self.adb.take_screenshot(temp_screenshot_path)
-            
-            if temp_screenshot_path.exists():
-                # 检查所有选项的背景颜色
-                for opt in options_after_click:
-                    is_green, is_red, rgb = self.check_option_background_color(opt, temp_screenshot_path)
-                    
-                    if is_green:
-                        # 找到正确答案
-                        answer = self.get_option_label(opt, options_after_click)
-                        if answer:
-                            # 删除临时截图
-                            if temp_screenshot_path.exists():
-                                temp_screenshot_path.unlink()
-                            print(f"  ✓ 通过点击选项找到正确答案: {answer} (绿色背景, RGB={rgb})")
-                            return answer
-                
-                # 删除临时截图
-                if temp_screenshot_path.exists():
-                    temp_screenshot_path.unlink()
+            if answer is None:
+                # 没找到时才重新获取UI树（布局可能已变化），dump内容有变化时用新的选项位置再检查同一张截图
+                root_after_click = self.adb.get_ui_tree_parsed()
+                if root_after_click is not root:
+                    answer, rgb = self._find_green_option(self.find_options(root_after_click), img)
+            
+            if answer:
+                print(f"  ✓ 通过点击选项找到正确答案: {answer} (绿色背景, RGB={rgb})")
+                return answer
         
         print("  ⚠️  点击所有选项后仍未找到绿色背景")
         return None
     
-    def extract_icon_from_screenshot(self, screenshot_path: Path, img_elem, output_path: Path) -> bool:
+    def extract_icon_from_screenshot(self, screenshot, img_elem, output_path: Path) -> bool:
         """从截图中裁剪图片元素并保存
         
         Args:
-            screenshot_path: 临时截图路径
+            screenshot: 临时截图路径，或已解码的截图（Image对象，多个元素共用时只解码一次）
             img_elem: 图片元素（XML Element）
             output_path: 输出图片路径
         
@@ -1248,8 +1611,8 @@ class QuestionCapture:
             是否成功保存
         """
         try:
-            if not screenshot_path.exists():
-                print(f"  ⚠️  截图文件不存在: {screenshot_path}")
+            if not isinstance(screenshot, Image.Image) and not screenshot.exists():
+                print(f"  ⚠️  截图文件不存在: {screenshot}")
                 return False
             
             # 获取图片元素的bounds坐标
@@ -1261,7 +1624,7 @@ class QuestionCapture:
             x1, y1, x2, y2 = bounds
             
             # 打开截图
-            img = Image.open(screenshot_path)
+            img = screenshot if isinstance(screenshot, Image.Image) else Image.open(screenshot)
             img_width, img_height = img.size
             
             # 确保坐标在图片范围内
@@ -1294,17 +1657,15 @@ class QuestionCapture:
             print(f"\n📸 开始采集 {part_info} 题目 #{part_question_num} (总题目 #{self.total_question_id + 1})")
             
             # 1. 获取当前页面元素
-            ui_tree = self.adb.get_ui_tree()
-            root = ET.fromstring(ui_tree)
+            root = self.adb.get_ui_tree_parsed()
             
             # 1.5. 检查是否在题目页面，如果不在则尝试进入当前Part
             if not self.is_in_question_page(root):
                 if self.current_part:
                     print(f"  ⚠️  当前不在题目页面，尝试重新进入 Part {self.current_part}...")
-                    if self.enter_part(self.current_part):
+                    if self.enter_part(self.current_part, root):
                         time.sleep(3)
-                        ui_tree = self.adb.get_ui_tree()
-                        root = ET.fromstring(ui_tree)
+                        root = self.adb.get_ui_tree_parsed()
                         if not self.is_in_question_page(root):
                             print("  ⚠️  进入Part后仍未检测到题目页面")
                             return False
@@ -1321,62 +1682,46 @@ class QuestionCapture:
                 if self.close_ad(root):
                     if not self.wait_for_ad_close():
                         print("  ❌ 广告关闭超时，保存进度并退出")
-                        self.save_progress()
+                        self._mark_progress_dirty()
                         return False
                     print("  ✓ 广告已关闭")
                     # 重新获取UI树
-                    ui_tree = self.adb.get_ui_tree()
-                    root = ET.fromstring(ui_tree)
+                    root = self.adb.get_ui_tree_parsed()
+            
+            # 题目编号和题目文本只提取一次，供去重检查和后面保存使用
+            page_question_num = self.extract_question_number_from_page(root)
+            question_text = self.extract_question_text(root)
+            
+            # 2.2. 页面内容与上一道已保存的题目相同（点击Next未生效或页面闪动），
+            # 不再重复检测答案、截图和保存，直接进入下一题（与2.5相同，需先点击选项启用Next）
+            if self._last_saved_digest is not None and \
+                    self._question_digest(root, question_text, page_question_num) == self._last_saved_digest:
+                print("  ⏭️  页面仍是上一道已保存的题目，跳过采集")
+                if self._skip_to_next_question(root):
+                    return True
+                print("  ⚠️  未找到Next按钮，可能已到最后一题")
+                return False
             
-            # 2.5. 提取题目编号并检查是否已存在
+            # 2.5. 检查当前题目编号是否已存在
             if self.current_part:
-                page_question_num = self.extract_question_number_from_page(root)
                 if page_question_num is not None:
                     if self.check_question_exists(self.current_part, page_question_num):
                         print(f"  ⏭️  题目 #{page_question_num} 已存在，跳过...")
-                        # 需要先点击选项才能点击Next按钮
-                        options = self.find_options(root)
-                        if options:
-                            # 点击第一个选项
-                            first_option = options[0]
-                            bounds = self.adb.get_element_bounds(first_option)
-                            if bounds:
-                                x, y = self.adb.get_center(bounds)
-                                print(f"  🎯 点击选项以启用Next按钮: ({x}, {y})")
-                                self.adb.tap(x, y)
-                                time.sleep(1)  # 短暂等待
-                                # 重新获取UI树
-                                root = ET.fromstring(self.adb.get_ui_tree())
-                        
-                        # 点击Next按钮进入下一题
-                        next_button = self.find_next_button(root)
-                        if next_button:
-                            bounds = self.adb.get_element_bounds(next_button)
-                            if bounds:
-                                x, y = self.adb.get_center(bounds)
-                                print(f"  🎯 点击'下一页'跳过: ({x}, {y})")
-                                self.adb.tap(x, y)
-                                time.sleep(WAIT_TIME_PAGE_UPDATE)
-                                # 更新进度（使用页面上的题目编号）
-                                if page_question_num > self.part_question_id.get(self.current_part, 0):
-                                    self.part_question_id[self.current_part] = page_question_num
-                                    self.total_question_id = max(self.total_question_id, sum(self.part_question_id.values()))
-                                self.save_progress()
-                                return True
-                        else:
+                        skipped = self._skip_to_next_question(root)
+                        if not skipped:
                             print("  ⚠️  未找到Next按钮，可能已到最后一题")
-                            # 更新进度
-                            if page_question_num > self.part_question_id.get(self.current_part, 0):
-                                self.part_question_id[self.current_part] = page_question_num
-                                self.total_question_id = max(self.total_question_id, sum(self.part_question_id.values()))
-                            self.save_progress()
-                            return False
+                        # 更新进度（使用页面上的题目编号）
+                        if page_question_num > self.part_question_id.get(self.current_part, 0):
+                            self._set_part_count(self.current_part, page_question_num)
+                            self.total_question_id = max(self.total_question_id, self._part_total)
+                        self._mark_progress_dirty()
+                        return skipped
                     else:
                         print(f"  ✓ 题目 #{page_question_num} 不存在，开始采集...")
                         # 更新进度以匹配页面上的题目编号
                         if page_question_num > self.part_question_id.get(self.current_part, 0):
-                            self.part_question_id[self.current_part] = page_question_num - 1
-                            self.total_question_id = sum(self.part_question_id.values())
+                            self._set_part_count(self.current_part, page_question_num - 1)
+                            self.total_question_id = self._part_total
             
             # 3. 查找选项
             options = self.find_options(root)
@@ -1396,7 +1741,7 @@ class QuestionCapture:
                 correct_answer = self.detect_correct_answer_by_clicking_options(root)
                 
                 # 重新获取UI树（点击选项后页面可能更新）
-                root = ET.fromstring(self.adb.get_ui_tree())
+                root = self.adb.get_ui_tree_parsed()
                 options = self.find_options(root)
             
             # 6. 如果还是没有找到，点击第一个选项继续（必须点击选项才能继续）
@@ -1410,13 +1755,12 @@ class QuestionCapture:
                     self.adb.tap(x, y)
                     time.sleep(WAIT_TIME_AFTER_CLICK)
                     # 重新获取UI树
-                    root = ET.fromstring(self.adb.get_ui_tree())
+                    root = self.adb.get_ui_tree_parsed()
                     options = self.find_options(root)
             
             # 7. 重新获取UI树（确保是最新状态）
             print("  🔍 获取最新的UI树...")
-            ui_tree_after_click = self.adb.get_ui_tree()
-            root_after_click = ET.fromstring(ui_tree_after_click)
+            root_after_click = self.adb.get_ui_tree_parsed()
             
             if not self.current_part:
                 print("  ⚠️  未设置current_part，无法保存题目数据")
@@ -1424,6 +1768,13 @@ class QuestionCapture:
             
             part_lower = self.current_part.lower()
             
+            # 有图片元素时立即在后台截图，与下面的文本提取并行
+            image_elements = self.find_image_elements(root_after_click)
+            temp_screenshot_path = Path("/tmp/temp_screenshot.png")
+            screenshot_future = None
+            if image_elements:
+                screenshot_future = self._io_pool.submit(self.adb.take_screenshot, temp_screenshot_path)
+            
             # 从页面提取题目编号（如果之前没有提取，现在重新提取）
             page_question_num = self.extract_question_number_from_page(root_after_click)
             if page_question_num is not None:
@@ -1433,9 +1784,7 @@ class QuestionCapture:
                 part_question_num = self.get_current_question_id() + 1
                 print(f"  ⚠️  无法从页面提取题目编号，使用自动编号: {part_question_num}")
             
-            # 7.1. 提取题目文本
-            print("  📝 提取题目文本...")
-            question_text = self.extract_question_text(root_after_click)
+            # 7.1. 题目文本（点击选项不会改变题干，沿用开头提取的结果）
             if not question_text:
                 print("  ⚠️  未能提取题目文本")
                 question_text = ""
@@ -1449,9 +1798,8 @@ class QuestionCapture:
                 print("  🔍 再次尝试检测正确答案...")
                 correct_answer = self.detect_correct_answer(root_after_click)
             
-            # 6.4. 查找并提取图片元素（只对图片元素进行截图）
+            # 6.4. 提取图片元素（只对图片元素进行截图，截图已在后台开始）
             print("  🖼️  查找页面中的图片元素...")
-            image_elements = self.find_image_elements(root_after_click)
             
             # 重新获取选项列表（用于分类图片）
             options_after_click = self.find_options(root_after_click)
@@ -1466,53 +1814,51 @@ class QuestionCapture:
             print(f"    - 选项图片: {len(option_images)} 个")
             
             # 临时截图用于提取图片元素（提取后删除）
-            temp_screenshot_path = Path("/tmp/temp_screenshot.png")
             question_image_paths = []
             option_image_paths = []
             
             if image_elements:
                 print(f"  📸 开始提取图片...")
-                # 临时截图
-                self.adb.take_screenshot(temp_screenshot_path)
+                # 等待后台临时截图完成，截图只解码一次，所有图片元素都从这一张裁剪
+                screenshot_future.result()
+                try:
+                    with Image.open(temp_screenshot_path) as screenshot:
+                        screenshot.load()
+                except OSError as e:
+                    print(f"  ⚠️  读取截图失败: {e}")
+                    screenshot = None
+                finally:
+                    # 删除临时截图
+                    temp_screenshot_path.unlink(missing_ok=True)
                 
                 # 确保输出目录存在
                 OPTIONS_IMAGES_DIR.mkdir(parents=True, exist_ok=True)
                 
-                # 提取题目图片
-                for idx, img_elem in enumerate(question_images):
-                    bounds = self.adb.get_element_bounds(img_elem)
-                    if bounds:
-                        x1, y1, x2, y2 = bounds
-                        width = x2 - x1
-                        height = y2 - y1
-                        # 生成图片文件名（题目图片）
-                        image_filename = f"part-{part_lower}-question-{part_question_num:03d}-q-image-{idx+1:02d}.png"
-                        image_path = OPTIONS_IMAGES_DIR / image_filename
-                        
-                        if self.extract_icon_from_screenshot(temp_screenshot_path, img_elem, image_path):
-                            relative_path = f"images/options/{image_filename}"
-                            question_image_paths.append(relative_path)
-                            print(f"  ✓ 题目图片已保存: {image_filename} (位置: [{x1},{y1}][{x2},{y2}], 尺寸: {width}x{height})")
+                # 各图片的裁剪和PNG编码互不依赖（Pillow编码时释放GIL），并行处理；
+                # 结果按原顺序收集，保证图片编号与文件列表一致
+                crop_jobs = []  # [(是否题目图片, 文件名, bounds, future), ...]
+                if screenshot is not None:
+                    for is_question_image, images in ((True, question_images), (False, option_images)):
+                        for idx, img_elem in enumerate(images):
+                            bounds = self.adb.get_element_bounds(img_elem)
+                            if bounds:
+                                # 生成图片文件名（题目图片q / 选项图片opt）
+                                kind = "q" if is_question_image else "opt"
+                                image_filename = f"part-{part_lower}-question-{part_question_num:03d}-{kind}-image-{idx+1:02d}.png"
+                                future = self._crop_pool.submit(self.extract_icon_from_screenshot, screenshot,
+                                                                img_elem, OPTIONS_IMAGES_DIR / image_filename)
+                                crop_jobs.append((is_question_image, image_filename, bounds, future))
                 
-                # 提取选项图片
-                for idx, img_elem in enumerate(option_images):
-                    bounds = self.adb.get_element_bounds(img_elem)
-                    if bounds:
-                        x1, y1, x2, y2 = bounds
-                        width = x2 - x1
-                        height = y2 - y1
-                        # 生成图片文件名（选项图片）
-                        image_filename = f"part-{part_lower}-question-{part_question_num:03d}-opt-image-{idx+1:02d}.png"
-                        image_path = OPTIONS_IMAGES_DIR / image_filename
-                        
-                        if self.extract_icon_from_screenshot(temp_screenshot_path, img_elem, image_path):
-                            relative_path = f"images/options/{image_filename}"
+                for is_question_image, image_filename, (x1, y1, x2, y2), future in crop_jobs:
+                    if future.result():
+                        relative_path = f"images/options/{image_filename}"
+                        location = f"(位置: [{x1},{y1}][{x2},{y2}], 尺寸: {x2 - x1}x{y2 - y1})"
+                        if is_question_image:
+                            question_image_paths.append(relative_path)
+                            print(f"  ✓ 题目图片已保存: {image_filename} {location}")
+                        else:
                             option_image_paths.append(relative_path)
-                            print(f"  ✓ 选项图片已保存: {image_filename} (位置: [{x1},{y1}][{x2},{y2}], 尺寸: {width}x{height})")
-                
-                # 删除临时截图
-                if temp_screenshot_path.exists():
-                    temp_screenshot_path.unlink()
+                            print(f"  ✓ 选项图片已保存: {image_filename} {location}")
             else:
                 print("  ℹ️  未找到图片元素")
             
@@ -1523,21 +1869,13 @@ class QuestionCapture:
             QUESTIONS_DIR.mkdir(parents=True, exist_ok=True)
             question_file = QUESTIONS_DIR / f"{question_id}.json"
             
-            # 为选项分配图片（如果有选项图片）
-            options_with_images = []
-            for idx, opt in enumerate(options_data):
-                option_data = {
-                    "label": opt["label"],
-                    "text": opt["text"],
-                    "has_image": False,
-                    "image": None
-                }
-                # 如果选项图片数量与选项数量匹配，尝试分配
-                # 注意：这里假设图片顺序与选项顺序对应，实际可能需要更智能的匹配
-                if idx < len(option_image_paths):
-                    option_data["has_image"] = True
-                    option_data["image"] = option_image_paths[idx]
-                options_with_images.append(option_data)
+            # 为选项分配图片（如果有选项图片）：按顺序一一对应，图片不足的选项为None，多余的图片丢弃
+            # 注意：这里假设图片顺序与选项顺序对应，实际可能需要更智能的匹配
+            options_with_images = [
+                {"label": opt["label"], "text": opt["text"], "has_image": img is not None, "image": img}
+                for opt, img in zip_longest(options_data, option_image_paths)
+                if opt is not None
+            ]
             
             question_data = {
                 "id": question_id,
@@ -1552,58 +1890,51 @@ class QuestionCapture:
                 "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            with open(question_file, "w", encoding="utf-8") as f:
-                json.dump(question_data, f, indent=2, ensure_ascii=False)
+            _write_json_atomic(question_file, _compact_question_data(question_data))
             
             print(f"  ✓ 题目数据已保存: {question_file}")
+            self._last_saved_digest = self._question_digest(root_after_click, question_text, page_question_num)
             
-            # 7. 查找并点击"下一页"按钮
-            time.sleep(0.5)  # 短暂等待，确保页面更新
-            print("  🔍 查找Next按钮...")
+            # 7. 查找并点击"下一页"按钮（root_after_click已是当前页面，无需再等待）
+            logger.debug("  🔍 查找Next按钮...")
             next_button = self.find_next_button(root_after_click)
-            print(f"  📊 find_next_button返回值类型: {type(next_button)}")
-            print(f"  📊 find_next_button返回值是否为None: {next_button is None}")
-            print(f"  📊 not next_button的值: {not next_button}")
-            print(f"  📊 bool(next_button)的值: {bool(next_button)}")
             if next_button is not None:
-                content_desc = next_button.get("content-desc", "")
-                clickable = next_button.get("clickable", "")
-                print(f"  📊 next_button元素: content-desc='{content_desc}' clickable={clickable}")
+                logger.debug("  📊 next_button元素: content-desc='%s' clickable=%s",
+                             next_button.get("content-desc", ""), next_button.get("clickable", ""))
             # 使用 is None 而不是 not，因为Element对象即使存在也可能被判断为False
             if next_button is None:
                 print("  ⚠️  未找到'下一页'按钮，可能已到最后一题")
                 # 调试：检查是否有Next按钮但没找到
-                for elem in root_after_click.iter():
-                    content = (elem.get('content-desc', '') + ' ' + elem.get('text', '')).lower()
-                    if 'next' in content:
-                        content_desc = elem.get('content-desc', '')
-                        clickable = elem.get('clickable', 'false')
-                        print(f"  🔍 调试: 发现Next元素但未匹配 - content-desc='{content_desc}' clickable={clickable}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    for elem in _XP_NEXT_TEXT(root_after_click):
+                        logger.debug("  🔍 调试: 发现Next元素但未匹配 - content-desc='%s' clickable=%s",
+                                     elem.get('content-desc', ''), elem.get('clickable', 'false'))
                 # 即使找不到Next按钮，也保存进度（可能Part已完成）
                 # 使用从页面提取的题目编号
                 if 'page_question_num' in locals() and page_question_num is not None:
-                    self.part_question_id[self.current_part] = page_question_num
-                    self.total_question_id = max(self.total_question_id, sum(self.part_question_id.values()))
+                    self._set_part_count(self.current_part, page_question_num)
+                    self.total_question_id = max(self.total_question_id, self._part_total)
                 else:
                     self.increment_question_id()
-                self.save_progress()
+                self._mark_progress_dirty()
                 return False
             
-            print(f"  📝 [capture_question] next_button不为None，准备获取bounds...")
+            logger.debug("  📝 [capture_question] next_button不为None，准备获取bounds...")
             bounds = self.adb.get_element_bounds(next_button)
-            print(f"  📝 [capture_question] bounds获取结果: {bounds}")
+            logger.debug("  📝 [capture_question] bounds获取结果: %s", bounds)
             if not bounds:
                 print("  ❌ 无法获取'下一页'按钮坐标")
                 return False
             
             x, y = self.adb.get_center(bounds)
-            print(f"  📝 [capture_question] Next按钮中心坐标: ({x}, {y})")
+            logger.debug("  📝 [capture_question] Next按钮中心坐标: (%s, %s)", x, y)
             print(f"  🎯 点击'下一页': ({x}, {y})")
+            prev_hash = self.adb.last_ui_hash
             self.adb.tap(x, y)
             
-            # 8. 等待并验证页面更新
-            print(f"  ⏳ 等待页面更新 ({WAIT_TIME_PAGE_UPDATE}秒)...")
-            time.sleep(WAIT_TIME_PAGE_UPDATE)
+            # 8. 等待并验证页面更新（页面一变化就继续，最多等待WAIT_TIME_PAGE_UPDATE秒）
+            print(f"  ⏳ 等待页面更新 (最多{WAIT_TIME_PAGE_UPDATE}秒)...")
+            self.adb.wait_for_ui_change(prev_hash, timeout=WAIT_TIME_PAGE_UPDATE)
             
             if not self.verify_page_update():
                 print("  ⚠️  页面可能未更新，继续尝试...")
@@ -1611,14 +1942,14 @@ class QuestionCapture:
             # 9. 更新进度（使用从页面提取的题目编号）
             if page_question_num is not None:
                 # 使用页面上的题目编号
-                self.part_question_id[self.current_part] = page_question_num
+                self._set_part_count(self.current_part, page_question_num)
                 # 更新总题目编号（取所有Part的最大值）
-                self.total_question_id = max(self.total_question_id, sum(self.part_question_id.values()))
+                self.total_question_id = max(self.total_question_id, self._part_total)
             else:
                 # 如果无法提取，使用自动递增
                 self.increment_question_id()
             
-            self.save_progress()
+            self._mark_progress_dirty()
             
             final_question_num = self.part_question_id.get(self.current_part, 0)
             print(f"  ✓ Part {self.current_part} 题目 #{final_question_num} 采集完成 (总题目 #{self.total_question_id})")
@@ -1642,22 +1973,16 @@ class QuestionCapture:
             return True
         
         # 检查是否有"完成"、"Finish"等提示
-        finish_keywords = ["完成", "Finish", "finish", "Done", "done", "Selesai", "selesai"]
-        for keyword in finish_keywords:
-            elements = self.find_elements_by_text(root, keyword, partial=True)
-            if elements:
-                print(f"  ✓ 检测到完成提示 '{keyword}'，Part已完成")
-                return True
+        for _, text_attr, content_desc, _, _ in self._search_text(root, _FINISH_RE):
+            print(f"  ✓ 检测到完成提示 '{content_desc or text_attr}'，Part已完成")
+            return True
         
         # 检查是否还在题目页面（如果不在题目页面且不在首页，可能是完成页面）
         if not self.is_in_question_page(root):
             # 检查是否有"返回"、"Back"等按钮（完成页面通常有返回按钮）
-            back_keywords = ["返回", "Back", "back", "Kembali", "kembali"]
-            for keyword in back_keywords:
-                elements = self.find_elements_by_text(root, keyword, partial=True)
-                if elements:
-                    print(f"  ✓ 检测到返回按钮 '{keyword}'，Part可能已完成")
-                    return True
+            for _, text_attr, content_desc, _, _ in self._search_text(root, _BACK_RE):
+                print(f"  ✓ 检测到返回按钮 '{content_desc or text_attr}'，Part可能已完成")
+                return True
         
         return False
     
@@ -1668,23 +1993,23 @@ class QuestionCapture:
             next_part = "A"
         else:
             # 找到当前Part在列表中的位置
-            try:
-                current_idx = PARTS_ORDER.index(self.current_part)
-                if current_idx < len(PARTS_ORDER) - 1:
-                    next_part = PARTS_ORDER[current_idx + 1]
-                else:
-                    print("  ✓ 所有Part已采集完成")
-                    return False
-            except ValueError:
+            current_idx = _PART_INDEX.get(self.current_part)
+            if current_idx is None:
                 # 如果当前Part不在列表中，从Part A开始
                 next_part = "A"
+            elif current_idx < len(PARTS_ORDER) - 1:
+                next_part = PARTS_ORDER[current_idx + 1]
+            else:
+                print("  ✓ 所有Part已采集完成")
+                return False
         
         print(f"\n🔄 切换到 Part {next_part}...")
         if self.enter_part(next_part):
             self.current_part = next_part
             # 如果这个Part还没有开始，初始化题目编号
             if next_part not in self.part_question_id:
-                self.part_question_id[next_part] = 0
+                self._set_part_count(next_part, 0)
+            # 切换Part是关键节点，立即写入进度（不经过节流）
             self.save_progress()
             time.sleep(3)  # 等待页面加载
             return True
@@ -1714,7 +2039,7 @@ class QuestionCapture:
             if self.enter_part(start_part):
                 self.current_part = start_part
                 if start_part not in self.part_question_id:
-                    self.part_question_id[start_part] = 0
+                    self._set_part_count(start_part, 0)
                 self.save_progress()
                 time.sleep(3)
             else:
@@ -1730,8 +2055,7 @@ class QuestionCapture:
                 break
             
             # 检查当前Part是否完成
-            ui_tree = self.adb.get_ui_tree()
-            root = ET.fromstring(ui_tree)
+            root = self.adb.get_ui_tree_parsed()
             if self.is_part_completed(root):
                 print(f"\n✓ Part {self.current_part} 采集完成")
                 # 切换到下一个Part
@@ -1756,8 +2080,9 @@ class QuestionCapture:
             else:
                 consecutive_failures = 0
                 count += 1
-                time.sleep(1)  # 题目之间的间隔
+                # 题目之间不再额外等待：capture_question点击Next后已用wait_for_ui_change等到页面变化
         
+        self.flush_progress()
         print("\n" + "=" * 60)
         print(f"📊 采集统计:")
         for part in PARTS_ORDER:
@@ -1794,17 +2119,31 @@ def main():
         action="store_true",
         help="重置进度，从头开始采集"
     )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="输出元素扫描/匹配过程的调试信息"
+    )
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    
     # 如果指定了reset，删除进度文件
     if args.reset:
         if PROGRESS_FILE.exists():
             PROGRESS_FILE.unlink()
             print("🔄 已重置进度文件")
     
+    # 被kill（SIGTERM）时也走正常退出流程，由atexit写入未保存的进度；
+    # Ctrl+C（SIGINT）保持默认的KeyboardInterrupt行为
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    
     try:
         capture = QuestionCapture(device_id=args.device)
-        capture.run(max_questions=args.max_questions, start_from_part=args.part)
+        try:
+            capture.run(max_questions=args.max_questions, start_from_part=args.part)
+        finally:
+            capture.close()
     except Exception as e:
         print(f"❌ 程序错误: {e}")
         import traceback
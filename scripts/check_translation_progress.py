@@ -6,24 +6,54 @@
 import json
 from pathlib import Path
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
 WEB_DIR = Path(__file__).parent.parent / "web"
 TRANSLATIONS_FILE = WEB_DIR / "public" / "translations" / "zh.json"
 
-def check_progress():
-    with open(TRANSLATIONS_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def _nonblank(s):
+    """是否为非空白字符串（isspace在C层扫描，不像strip()那样分配新字符串）"""
+    return bool(s) and not s.isspace()
+
+def iter_translated_questions(path=TRANSLATIONS_FILE):
+    """逐个产出翻译文件中的(题目ID, 翻译数据)
     
-    questions = data.get("questions", {})
-    total = len(questions)
+    有ijson时流式解析，每道题处理完即可释放，不在内存中保留整个文件；
+    否则整体解析（有orjson时用orjson）
+    """
+    if IJSON_AVAILABLE:
+        with open(path, "rb") as f:
+            yield from ijson.kvitems(f, "questions")
+        return
     
+    if ORJSON_AVAILABLE:
+        data = orjson.loads(path.read_bytes())
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    yield from data.get("questions", {}).items()
+
+def check_progress():
+    total = 0
     translated_questions = 0
     translated_options_total = 0
     incomplete_questions = []
     
-    for q_id, q_data in questions.items():
-        has_question = bool(q_data.get("question", "").strip())
+    for q_id, q_data in iter_translated_questions():
+        total += 1
+        has_question = _nonblank(q_data.get("question", ""))
         options = q_data.get("options", {})
-        translated_options = sum(1 for v in options.values() if v and v.strip())
+        translated_options = sum(1 for v in options.values() if _nonblank(v))
         total_options = len(options)
         
         if has_question and translated_options == total_options:
@@ -2,12 +2,26 @@
 """
 清理旧的图片文件（可选，重新抓取前使用）
 """
+import os
 from pathlib import Path
 
 PUBLIC_DIR = Path(__file__).parent.parent / "web" / "public"
 QUESTIONS_IMAGES_DIR = PUBLIC_DIR / "images" / "questions"
 OPTIONS_IMAGES_DIR = PUBLIC_DIR / "images" / "options"
 
+def remove_png_files(directory: Path) -> int:
+    """删除目录下的所有.png文件（不含子目录），返回删除数量
+    
+    一次scandir取得目录项后直接os.unlink，不为每个文件构造Path对象
+    """
+    count = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(".png") and not entry.is_dir(follow_symlinks=False):
+                os.unlink(entry.path)
+                count += 1
+    return count
+
 def clean_old_images():
     """清理旧图片"""
     print("=" * 60)
@@ -18,17 +32,13 @@ def clean_old_images():
     options_count = 0
     
     if QUESTIONS_IMAGES_DIR.exists():
-        for img_file in QUESTIONS_IMAGES_DIR.glob("*.png"):
-            img_file.unlink()
-            questions_count += 1
+        questions_count = remove_png_files(QUESTIONS_IMAGES_DIR)
         print(f"✓ 清理了 {questions_count} 个题目图片")
     else:
         print("⚠️  题目图片目录不存在")
     
     if OPTIONS_IMAGES_DIR.exists():
-        for img_file in OPTIONS_IMAGES_DIR.glob("*.png"):
-            img_file.unlink()
-            options_count += 1
+        options_count = remove_png_files(OPTIONS_IMAGES_DIR)
         print(f"✓ 清理了 {options_count} 个选项图片")
     else:
         print("⚠️  选项图片目录不存在")
@@ -7,26 +7,77 @@ KPP题目数据清洗脚本
 import json
 import re
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Set
 import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # 配置
-DATA_DIR = Path(__file__).parent.parent / "data"
+REPO_ROOT = Path(__file__).parent.parent
+_REPO_ROOT_STR = str(REPO_ROOT)  # 图片检查用os.path拼接，不构造Path对象
+DATA_DIR = REPO_ROOT / "data"
 QUESTIONS_DIR = DATA_DIR / "questions"
 TRANSLATIONS_DIR = DATA_DIR / "translations"
-IMAGES_DIR = Path(__file__).parent.parent / "images"
+IMAGES_DIR = REPO_ROOT / "images"
+# 连续空白（含换行）与连续中文字符，模块加载时编译一次
+_WS_RE = re.compile(r'\s+')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]+')
+
+# 每个工作进程一次领取的文件数，减少进程间通信次数
+PROCESS_CHUNKSIZE = 32
+
+def _load_json(path: Path):
+    """读取JSON文件（有orjson时直接解析字节）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _dump_json(path: Path, data, sort_keys: bool = False):
+    """一次write写出缩进2格的JSON（有orjson时输出与json.dump(indent=2, ensure_ascii=False)一致）
+    
+    sort_keys=True时按键排序，输出顺序稳定，重复生成时diff更小
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        path.write_bytes(orjson.dumps(data, option=option))
+        return
+    # 先序列化成完整字符串再一次写入，避免json.dump逐片段调用write
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False, sort_keys=sort_keys), encoding="utf-8")
 
 def clean_text(text: str) -> str:
     """清洗文本：去除多余的空格和换行"""
     if not text:
         return ""
-    # 去除首尾空白
-    text = text.strip()
-    # 将多个连续空格替换为单个空格
-    text = re.sub(r'\s+', ' ', text)
-    # 去除多余的换行
-    text = re.sub(r'\n+', ' ', text)
-    return text
+    # 去除首尾空白，并把连续空白（\s已包含换行）一次替换为单个空格
+    return _WS_RE.sub(' ', text.strip())
+
+def _split_cjk(text: str) -> Tuple[str, List[str]]:
+    """一次finditer扫描，同时得到去掉中文后的文本和各段中文（代替findall + sub两遍扫描）
+    
+    Returns:
+        (other_text, chinese_parts): 移除中文后拼接的其余文本、按出现顺序的中文片段
+    """
+    other_parts = []
+    chinese_parts = []
+    last = 0
+    for m in _CJK_RE.finditer(text):
+        other_parts.append(text[last:m.start()])
+        chinese_parts.append(m.group())
+        last = m.end()
+    if not chinese_parts:
+        return text, chinese_parts
+    other_parts.append(text[last:])
+    return ''.join(other_parts), chinese_parts
 
 def separate_bilingual_text(text: str) -> Tuple[str, Optional[str]]:
     """分离双语文本（马来文+英文）
@@ -50,20 +101,14 @@ def separate_bilingual_text(text: str) -> Tuple[str, Optional[str]]:
     # 当前策略：保持原样，英文部分作为主要文本
     # 翻译部分（如果有中文）会在后续处理中提取
     
-    # 检查是否有中文
-    has_chinese = bool(re.search(r'[\u4e00-\u9fff]', text))
+    # 一次扫描把文本拆成非中文部分和中文片段
+    other_text, chinese_parts = _split_cjk(text)
     
-    if has_chinese:
+    if chinese_parts:
         # 如果有中文，尝试分离
         # 通常格式：英文 + 中文 或 中文 + 英文
-        # 这里简单处理：保留英文部分，提取中文部分
-        chinese_parts = re.findall(r'[\u4e00-\u9fff]+', text)
-        if chinese_parts:
-            # 移除中文部分，保留英文
-            english_text = re.sub(r'[\u4e00-\u9fff]+', '', text)
-            english_text = clean_text(english_text)
-            translation_text = ' '.join(chinese_parts)
-            return english_text, translation_text
+        # 这里简单处理：保留英文部分（移除中文后的文本），提取中文部分
+        return clean_text(other_text), ' '.join(chinese_parts)
     
     # 如果没有中文，保持原样（马来文+英文混合）
     # 在实际应用中，可能需要将马来文翻译为英文
@@ -77,14 +122,58 @@ def extract_translation_from_text(text: str) -> Optional[str]:
         return None
     
     # 提取中文字符
-    chinese_chars = re.findall(r'[\u4e00-\u9fff]+', text)
+    chinese_chars = _CJK_RE.findall(text)
     if chinese_chars:
         return ' '.join(chinese_chars)
     
     return None
 
-def validate_question_data(question_data: Dict) -> Tuple[bool, List[str]]:
-    """验证题目数据的完整性"""
+def scan_existing_images(images_dir: Path = IMAGES_DIR) -> Set[str]:
+    """用os.scandir遍历一遍图片目录，收集所有图片相对项目根目录的路径（如"images/options/a.png"）"""
+    existing = set()
+    prefix = images_dir.name
+    stack = [(str(images_dir), prefix)]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path))
+                else:
+                    existing.add(rel_path)
+    return existing
+
+def _image_exists(img_path: str, existing_images: Optional[Set[str]]) -> bool:
+    """图片是否存在：先查预扫描的集合，未命中（或路径写法不规范）时再stat一次"""
+    if existing_images is not None and img_path in existing_images:
+        return True
+    return os.path.exists(os.path.join(_REPO_ROOT_STR, img_path))
+
+def _iter_image_paths(question_data: Dict):
+    """依次产出题目引用的所有图片：先题目图片、再选项图片
+    
+    Yields:
+        (kind, img_path): kind为"题目"或"选项"，跳过空路径
+    """
+    for img_path in question_data.get("question_images", []):
+        if img_path:
+            yield "题目", img_path
+    for option in question_data.get("options", []):
+        if isinstance(option, dict) and option.get("image"):
+            yield "选项", option["image"]
+
+def validate_question_data(question_data: Dict, existing_images: Optional[Set[str]] = None) -> Tuple[bool, List[str]]:
+    """验证题目数据的完整性
+    
+    Args:
+        question_data: 题目数据
+        existing_images: scan_existing_images的结果；为None时逐个stat检查图片
+    """
     errors = []
     
     # 检查必需字段
@@ -126,22 +215,10 @@ def validate_question_data(question_data: Dict) -> Tuple[bool, List[str]]:
                 if answer not in option_labels:
                     errors.append(f"答案 {answer} 不在选项范围内: {option_labels}")
     
-    # 检查图片路径
-    if "question_images" in question_data:
-        for img_path in question_data["question_images"]:
-            if img_path:
-                full_path = Path(__file__).parent.parent / img_path
-                if not full_path.exists():
-                    errors.append(f"题目图片不存在: {img_path}")
-    
-    if "options" in question_data:
-        for option in question_data["options"]:
-            if isinstance(option, dict) and option.get("image"):
-                img_path = option["image"]
-                if img_path:
-                    full_path = Path(__file__).parent.parent / img_path
-                    if not full_path.exists():
-                        errors.append(f"选项图片不存在: {img_path}")
+    # 检查图片路径（题目图片和选项图片在同一个循环中检查）
+    for kind, img_path in _iter_image_paths(question_data):
+        if not _image_exists(img_path, existing_images):
+            errors.append(f"{kind}图片不存在: {img_path}")
     
     return len(errors) == 0, errors
 
@@ -151,8 +228,7 @@ def clean_question_file(question_file: Path) -> Tuple[Dict, Dict]:
     Returns:
         (cleaned_question_data, translation_data): 清洗后的题目数据和翻译数据
     """
-    with open(question_file, "r", encoding="utf-8") as f:
-        question_data = json.load(f)
+    question_data = _load_json(question_file)
     
     # 清洗题目文本
     if "question_text" in question_data:
@@ -160,8 +236,8 @@ def clean_question_file(question_file: Path) -> Tuple[Dict, Dict]:
         english_text, translation_text = separate_bilingual_text(original_text)
         question_data["question_text"] = english_text
         
-        # 提取翻译（如果有中文）
-        chinese_translation = extract_translation_from_text(original_text)
+        # 提取翻译（如果有中文）：分离时已得到，与extract_translation_from_text的结果相同
+        chinese_translation = translation_text
     
     # 清洗选项文本
     translation_options = {}
@@ -169,12 +245,11 @@ def clean_question_file(question_file: Path) -> Tuple[Dict, Dict]:
         for option in question_data["options"]:
             if "text" in option:
                 original_option_text = option["text"]
-                english_option_text, _ = separate_bilingual_text(original_option_text)
+                english_option_text, chinese_option = separate_bilingual_text(original_option_text)
                 option["text"] = english_option_text
                 
                 # 提取选项翻译（如果有中文）
                 option_label = option.get("label", "")
-                chinese_option = extract_translation_from_text(original_option_text)
                 if chinese_option and option_label:
                     translation_options[option_label] = chinese_option
     
@@ -189,6 +264,57 @@ def clean_question_file(question_file: Path) -> Tuple[Dict, Dict]:
     
     return question_data, translation_data
 
+# 当前进程可见的图片路径集合（scan_existing_images的结果），由_init_worker设置；
+# 为None时逐个stat检查图片
+_existing_images: Optional[Set[str]] = None
+
+def _init_worker(existing_images: Optional[Set[str]]):
+    """设置本进程的图片路径集合：进程池中每个工作进程启动时只接收一次，不随每批任务重复传输"""
+    global _existing_images
+    _existing_images = existing_images
+
+def process_one(question_file: Path) -> Tuple[str, Optional[Dict], List[str], Optional[Tuple[str, str]]]:
+    """清洗、验证并保存单个题目文件（在工作进程中执行，不直接打印）
+    
+    图片存在性检查使用_init_worker设置的图片路径集合
+    
+    Args:
+        question_file: 题目文件路径
+    
+    Returns:
+        (question_id, translation_data, errors, failure):
+        errors非空表示验证失败、文件未改写；
+        failure为处理异常时的(异常信息, traceback文本)，否则为None
+    """
+    try:
+        # 清洗题目数据
+        cleaned_data, translation_data = clean_question_file(question_file)
+        
+        # 验证数据
+        is_valid, errors = validate_question_data(cleaned_data, _existing_images)
+        if not is_valid:
+            return "", None, errors, None
+        
+        # 保存清洗后的数据（覆盖原文件）
+        _dump_json(question_file, cleaned_data)
+        return cleaned_data.get("id", ""), translation_data, [], None
+    except Exception as e:
+        return "", None, [], (str(e), traceback.format_exc())
+
+def _map_question_files(question_files, existing_images: Optional[Set[str]]):
+    """按顺序产出process_one(question_file)的结果
+    
+    各文件互不依赖，分发到多个进程并行处理；map按提交顺序返回，输出顺序与逐个处理时一致。
+    图片路径集合通过进程池的initializer每个工作进程只传一次
+    """
+    if len(question_files) < 2 * PROCESS_CHUNKSIZE:
+        # 文件很少时进程池的启动开销大于收益，直接在当前进程处理
+        _init_worker(existing_images)
+        yield from map(process_one, question_files)
+        return
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(existing_images,)) as executor:
+        yield from executor.map(process_one, question_files, chunksize=PROCESS_CHUNKSIZE)
+
 def main():
     """主函数"""
     print("=" * 60)
@@ -214,42 +340,36 @@ def main():
     errors_count = 0
     translations = {}
     
+    # 一次扫描图片目录，验证时只做集合查找，不再逐个stat
+    existing_images = scan_existing_images()
+    
     # 处理每个题目文件
-    for question_file in question_files:
-        try:
-            print(f"\n📝 处理: {question_file.name}")
-            
-            # 清洗题目数据
-            cleaned_data, translation_data = clean_question_file(question_file)
-            
-            # 验证数据
-            is_valid, errors = validate_question_data(cleaned_data)
-            
-            if not is_valid:
-                print(f"  ⚠️  数据验证失败:")
-                for error in errors:
-                    print(f"    - {error}")
-                errors_count += 1
-                continue
-            
-            # 保存清洗后的数据（覆盖原文件）
-            with open(question_file, "w", encoding="utf-8") as f:
-                json.dump(cleaned_data, f, indent=2, ensure_ascii=False)
-            
-            # 收集翻译数据
-            question_id = cleaned_data.get("id", "")
-            if translation_data and (translation_data.get("question") or translation_data.get("options")):
-                translations[question_id] = translation_data
-            
-            cleaned_questions += 1
-            total_questions += 1
-            print(f"  ✓ 清洗完成")
-            
-        except Exception as e:
-            print(f"  ❌ 处理失败: {e}")
+    results = _map_question_files(question_files, existing_images)
+    for question_file, (question_id, translation_data, errors, failure) in zip(question_files, results):
+        print(f"\n📝 处理: {question_file.name}")
+        
+        if failure:
+            message, trace = failure
+            print(f"  ❌ 处理失败: {message}")
+            errors_count += 1
+            sys.stdout.flush()
+            sys.stderr.write(trace)
+            continue
+        
+        if errors:
+            print(f"  ⚠️  数据验证失败:")
+            for error in errors:
+                print(f"    - {error}")
             errors_count += 1
-            import traceback
-            traceback.print_exc()
+            continue
+        
+        # 收集翻译数据
+        if translation_data and (translation_data.get("question") or translation_data.get("options")):
+            translations[question_id] = translation_data
+        
+        cleaned_questions += 1
+        total_questions += 1
+        print(f"  ✓ 清洗完成")
     
     # 生成翻译数据文件
     if translations:
@@ -257,8 +377,7 @@ def main():
         translation_output = {
             "questions": translations
         }
-        with open(translation_file, "w", encoding="utf-8") as f:
-            json.dump(translation_output, f, indent=2, ensure_ascii=False)
+        _dump_json(translation_file, translation_output, sort_keys=True)
         print(f"\n✓ 翻译数据已保存: {translation_file}")
         print(f"  包含 {len(translations)} 个题目的翻译")
     else:
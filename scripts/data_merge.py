@@ -5,9 +5,24 @@ KPP题目数据汇总脚本
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Set, Tuple
 import hashlib
+import re
+import shutil
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # 配置
 DATA_DIR = Path(__file__).parent.parent / "data"
@@ -15,53 +30,132 @@ QUESTIONS_DIR = DATA_DIR / "questions"
 TRANSLATIONS_DIR = DATA_DIR / "translations"
 OUTPUT_FILE = DATA_DIR / "questions.json"
 OUTPUT_TRANSLATIONS_FILE = TRANSLATIONS_DIR / "zh.json"
+MERGE_CACHE_DIR = DATA_DIR / ".merge_cache"  # 题目文件未变化时直接复用上次的汇总结果
+
+# 文件名 part-{part}-question-{编号}：第2段为part，第4段整段是数字时为题号，否则题号按0计
+_SORT_RE = re.compile(r"^[^-]*-([^-]*)-[^-]*-(?:(\d+)(?=-|$))?")
+READ_WORKERS = 16  # 并行读取题目文件的线程数（小文件读取以等待I/O为主）
 
-def calculate_question_hash(question_data: Dict) -> str:
-    """计算题目的哈希值，用于去重"""
-    # 使用题目文本和选项文本计算哈希
-    key_parts = [
-        question_data.get("question_text", ""),
-    ]
-    for option in question_data.get("options", []):
-        key_parts.append(option.get("text", ""))
+def _load_json(path: Path):
+    """读取JSON文件（有orjson时直接解析字节）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _dump_json(path: Path, data):
+    """一次write写出缩进2格的JSON（有orjson时输出与json.dump(indent=2, ensure_ascii=False)一致）"""
+    if ORJSON_AVAILABLE:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    # 先序列化成完整字符串再一次写入，避免json.dump逐片段调用write
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def _read_question_file(question_file: Path):
+    """读取并解析单个题目文件，异常作为结果返回，由调用方按文件顺序报告
     
-    key_string = "|".join(key_parts)
-    return hashlib.md5(key_string.encode("utf-8")).hexdigest()
+    Returns:
+        (question_data, error): 成功时error为None，失败时question_data为None
+    """
+    try:
+        return _load_json(question_file), None
+    except Exception as e:
+        return None, e
 
-def convert_to_final_format(question_data: Dict, new_id: str) -> Dict:
-    """转换为最终数据库结构格式"""
-    # 确定题目类型
-    has_image_options = question_data.get("has_image_options", False)
-    question_type = "image-options" if has_image_options else "text"
+def convert_question(question_data: Dict) -> Tuple[int, Dict]:
+    """一次遍历选项，同时计算题目指纹并转换为最终数据库结构格式
+    
+    指纹为64位整数，只用于去重，不需要密码学强度：有xxhash时用xxh3，否则用BLAKE2b（8字节摘要）。
+    题目文本和各选项文本以"|"分隔逐段送入哈希，不拼接中间字符串
+    
+    Returns:
+        (question_hash, final_data): final_data的"id"留空，由调用方在去重后填入新ID
+    """
+    get = question_data.get
+    question_text = get("question_text", "")
+    h = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=8)
+    h.update(question_text.encode("utf-8"))
     
     # 转换选项格式
     options = []
-    for option in question_data.get("options", []):
-        option_type = "image" if option.get("has_image", False) else "text"
+    for option in get("options", []):
+        text = option.get("text", "")
+        h.update(b"|")
+        h.update(text.encode("utf-8"))
         option_dict = {
-            "type": option_type,
+            "type": "image" if option.get("has_image", False) else "text",
             "label": option.get("label", ""),
-            "content": option.get("text", ""),
+            "content": text,
         }
-        if option.get("image"):
-            option_dict["imagePath"] = option["image"]
+        image = option.get("image")
+        if image:
+            option_dict["imagePath"] = image
         options.append(option_dict)
     
+    # 正确答案在汇总时就去掉首尾空白，前端按label做精确比较
+    correct_answer = get("correct_answer")
+    if isinstance(correct_answer, str):
+        correct_answer = correct_answer.strip()
+    
     # 构建最终格式
     final_data = {
-        "id": new_id,
-        "question": question_data.get("question_text", ""),
-        "questionType": question_type,
+        "id": None,
+        "question": question_text,
+        "questionType": "image-options" if get("has_image_options", False) else "text",
         "options": options,
-        "correctAnswer": question_data.get("correct_answer"),
-        "questionImages": question_data.get("question_images", [])
+        "correctAnswer": correct_answer,
+        "questionImages": get("question_images", [])
     }
     
-    return final_data
+    return int.from_bytes(h.digest(), "big"), final_data
+
+def _list_question_files() -> List[Path]:
+    """按文件名排序列出所有题目文件"""
+    return sorted(QUESTIONS_DIR.glob("part-*-question-*.json"))
+
+def _merge_cache_key(question_files: List[Path]) -> str:
+    """按输入文件的(文件名, mtime, 大小)计算汇总缓存键
+    
+    本脚本自身也计入，汇总逻辑修改后旧缓存自动失效
+    """
+    h = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=8)
+    for path in [Path(__file__), *question_files]:
+        st = path.stat()
+        h.update(f"{path.name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def _read_merge_cache(cache_key: str):
+    """读取汇总缓存
+    
+    Returns:
+        (题目数, 旧ID -> 新ID映射)，缓存不存在或不完整时返回None
+    """
+    meta_file = MERGE_CACHE_DIR / f"{cache_key}.ids.json"
+    if not meta_file.exists() or not (MERGE_CACHE_DIR / f"{cache_key}.json").exists():
+        return None
+    try:
+        meta = _load_json(meta_file)
+        return meta["total"], meta["question_id_map"]
+    except Exception:
+        return None
+
+def _write_merge_cache(cache_key: str, total: int, question_id_map: Dict[str, str]):
+    """把刚保存的汇总结果写入缓存（只保留最新一份），写缓存失败不影响汇总本身"""
+    try:
+        if MERGE_CACHE_DIR.exists():
+            shutil.rmtree(MERGE_CACHE_DIR)
+        MERGE_CACHE_DIR.mkdir(parents=True)
+        shutil.copyfile(OUTPUT_FILE, MERGE_CACHE_DIR / f"{cache_key}.json")
+        # ID映射最后写入，存在即表示该缓存完整
+        _dump_json(MERGE_CACHE_DIR / f"{cache_key}.ids.json",
+                   {"total": total, "question_id_map": question_id_map})
+    except OSError as e:
+        print(f"⚠️  写入汇总缓存失败: {e}")
 
-def merge_questions() -> Tuple[List[Dict], Dict]:
+def merge_questions(question_files: List[Path] = None) -> Tuple[List[Dict], Dict]:
     """汇总所有Part的题目"""
-    question_files = sorted(QUESTIONS_DIR.glob("part-*-question-*.json"))
+    if question_files is None:
+        question_files = _list_question_files()
     
     if not question_files:
         print("⚠️  未找到题目文件")
@@ -70,31 +164,33 @@ def merge_questions() -> Tuple[List[Dict], Dict]:
     print(f"📂 找到 {len(question_files)} 个题目文件")
     
     all_questions = []
-    seen_hashes: Set[str] = set()
+    seen_hashes: Set[int] = set()
     question_id_map = {}  # 旧ID -> 新ID映射
     
     question_counter = 1
     
     # 按Part和题目编号排序
     def get_sort_key(file_path: Path) -> tuple:
-        name = file_path.stem
         # 提取 part 和 question_number
-        parts = name.split("-")
-        if len(parts) >= 3:
-            part = parts[1].upper()
-            question_num = int(parts[3]) if parts[3].isdigit() else 0
-            return (part, question_num)
+        m = _SORT_RE.match(file_path.stem)
+        if m:
+            question_num = m.group(2)
+            return (m.group(1).upper(), int(question_num) if question_num else 0)
         return ("", 0)
     
     sorted_files = sorted(question_files, key=get_sort_key)
     
-    for question_file in sorted_files:
+    # 只有文件读取并行；map按提交顺序返回结果，去重和编号仍按排序后的顺序串行进行
+    with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+        loaded = list(executor.map(_read_question_file, sorted_files))
+    
+    for question_file, (question_data, read_error) in zip(sorted_files, loaded):
         try:
-            with open(question_file, "r", encoding="utf-8") as f:
-                question_data = json.load(f)
+            if read_error is not None:
+                raise read_error
             
-            # 计算哈希值检查重复
-            question_hash = calculate_question_hash(question_data)
+            # 计算指纹并转换为最终格式，按指纹检查重复
+            question_hash, final_question = convert_question(question_data)
             if question_hash in seen_hashes:
                 print(f"  ⚠️  跳过重复题目: {question_file.name}")
                 continue
@@ -106,8 +202,7 @@ def merge_questions() -> Tuple[List[Dict], Dict]:
             old_id = question_data.get("id", "")
             question_id_map[old_id] = new_id
             
-            # 转换为最终格式
-            final_question = convert_to_final_format(question_data, new_id)
+            final_question["id"] = new_id
             all_questions.append(final_question)
             
             question_counter += 1
@@ -128,8 +223,7 @@ def update_translations(question_id_map: Dict[str, str]) -> Dict:
         return {}
     
     try:
-        with open(translation_file, "r", encoding="utf-8") as f:
-            translations = json.load(f)
+        translations = _load_json(translation_file)
         
         updated_translations = {}
         questions = translations.get("questions", {})
@@ -178,44 +272,55 @@ def main():
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     TRANSLATIONS_DIR.mkdir(parents=True, exist_ok=True)
     
-    # 汇总题目
-    print("\n📦 开始汇总题目...")
-    all_questions, question_id_map = merge_questions()
-    
-    if not all_questions:
-        print("⚠️  没有题目可汇总")
-        return
-    
-    print(f"✓ 汇总完成，共 {len(all_questions)} 道题目")
-    
-    # 验证数据
-    print("\n🔍 验证数据...")
-    is_valid, errors = validate_merged_data(all_questions)
-    
-    if not is_valid:
-        print("⚠️  数据验证失败:")
-        for error in errors:
-            print(f"  - {error}")
-        return
-    
-    print("✓ 数据验证通过")
+    question_files = _list_question_files()
+    cache_key = _merge_cache_key(question_files) if question_files else None
+    cached = _read_merge_cache(cache_key) if cache_key else None
     
-    # 保存汇总后的题目数据
-    print(f"\n💾 保存汇总数据到: {OUTPUT_FILE}")
-    output_data = {
-        "total": len(all_questions),
-        "questions": all_questions
-    }
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
-    print("✓ 题目数据已保存")
+    if cached:
+        # 题目文件都没有变化：直接复用上次的汇总结果，跳过读取、去重和验证
+        question_count, question_id_map = cached
+        print(f"\n♻️  题目文件未变化，使用汇总缓存: {MERGE_CACHE_DIR}")
+        shutil.copyfile(MERGE_CACHE_DIR / f"{cache_key}.json", OUTPUT_FILE)
+        print(f"✓ 题目数据已保存: {OUTPUT_FILE}")
+    else:
+        # 汇总题目
+        print("\n📦 开始汇总题目...")
+        all_questions, question_id_map = merge_questions(question_files)
+        
+        if not all_questions:
+            print("⚠️  没有题目可汇总")
+            return
+        
+        question_count = len(all_questions)
+        print(f"✓ 汇总完成，共 {question_count} 道题目")
+        
+        # 验证数据
+        print("\n🔍 验证数据...")
+        is_valid, errors = validate_merged_data(all_questions)
+        
+        if not is_valid:
+            print("⚠️  数据验证失败:")
+            for error in errors:
+                print(f"  - {error}")
+            return
+        
+        print("✓ 数据验证通过")
+        
+        # 保存汇总后的题目数据
+        print(f"\n💾 保存汇总数据到: {OUTPUT_FILE}")
+        output_data = {
+            "total": question_count,
+            "questions": all_questions
+        }
+        _dump_json(OUTPUT_FILE, output_data)
+        print("✓ 题目数据已保存")
+        _write_merge_cache(cache_key, question_count, question_id_map)
     
     # 更新翻译文件
     print(f"\n🌐 更新翻译数据...")
     updated_translations = update_translations(question_id_map)
     if updated_translations:
-        with open(OUTPUT_TRANSLATIONS_FILE, "w", encoding="utf-8") as f:
-            json.dump(updated_translations, f, indent=2, ensure_ascii=False)
+        _dump_json(OUTPUT_TRANSLATIONS_FILE, updated_translations)
         print(f"✓ 翻译数据已更新: {OUTPUT_TRANSLATIONS_FILE}")
         print(f"  包含 {len(updated_translations.get('questions', {}))} 个题目的翻译")
     else:
@@ -224,7 +329,7 @@ def main():
     # 输出统计信息
     print("\n" + "=" * 60)
     print("📊 汇总统计:")
-    print(f"  总题目数: {len(all_questions)}")
+    print(f"  总题目数: {question_count}")
     print(f"  输出文件: {OUTPUT_FILE}")
     print(f"  翻译文件: {OUTPUT_TRANSLATIONS_FILE}")
     print("=" * 60)
@@ -4,43 +4,131 @@
 功能：从questions.json读取所有题目，生成翻译文件结构
 """
 
+import hashlib
 import json
+import shutil
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 # 配置
 WEB_DIR = Path(__file__).parent.parent / "web"
 QUESTIONS_FILE = WEB_DIR / "src" / "data" / "questions.json"
 OUTPUT_ZH_FILE = WEB_DIR / "public" / "translations" / "zh.json"
 OUTPUT_EN_FILE = WEB_DIR / "public" / "translations" / "en.json"
+# questions.json未变化时直接复用上次生成的翻译文件
+CACHE_DIR = Path(__file__).parent.parent / "data" / ".translations_cache"
 
-def generate_translation_structure(questions: List[Dict]) -> Dict[str, Dict]:
-    """为所有题目生成翻译数据结构"""
-    translations = {}
+def _load_json(path: Path):
+    """读取JSON文件（有orjson时直接解析字节）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(path.read_bytes())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _dump_json(path: Path, data):
+    """一次write写出缩进2格的JSON（有orjson时输出与json.dump(indent=2, ensure_ascii=False)一致）"""
+    if ORJSON_AVAILABLE:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    # 先序列化成完整字符串再一次写入，避免json.dump逐片段调用write
+    path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def _cache_key() -> str:
+    """按questions.json和本脚本的(mtime, 大小)计算缓存键"""
+    h = xxhash.xxh3_64() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=8)
+    for path in (Path(__file__), QUESTIONS_FILE):
+        st = path.stat()
+        h.update(f"{path.name}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def _read_cache(cache_key: str):
+    """读取缓存的统计信息
+    
+    Returns:
+        (题目数, 翻译结构数)，缓存不存在或不完整时返回None
+    """
+    meta_file = CACHE_DIR / f"{cache_key}.meta.json"
+    if not meta_file.exists():
+        return None
+    if not (CACHE_DIR / f"{cache_key}.zh.json").exists() or not (CACHE_DIR / f"{cache_key}.en.json").exists():
+        return None
+    try:
+        meta = _load_json(meta_file)
+        return meta["total"], meta["translations"]
+    except Exception:
+        return None
+
+def _write_cache(cache_key: str, total: int, translation_count: int):
+    """把刚保存的翻译文件写入缓存（只保留最新一份），写缓存失败不影响生成本身"""
+    try:
+        if CACHE_DIR.exists():
+            shutil.rmtree(CACHE_DIR)
+        CACHE_DIR.mkdir(parents=True)
+        shutil.copyfile(OUTPUT_ZH_FILE, CACHE_DIR / f"{cache_key}.zh.json")
+        shutil.copyfile(OUTPUT_EN_FILE, CACHE_DIR / f"{cache_key}.en.json")
+        # 统计信息最后写入，存在即表示该缓存完整
+        _dump_json(CACHE_DIR / f"{cache_key}.meta.json",
+                   {"total": total, "translations": translation_count})
+    except OSError as e:
+        print(f"⚠️  写入翻译缓存失败: {e}")
+
+def build_translations(questions: List[Dict]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """一次遍历题目，同时生成中文翻译结构和英文翻译数据
+    
+    Returns:
+        (zh_translations, en_translations): 中文的翻译内容留空待填充，
+        英文题目本身就是英文，直接使用原文本
+    """
+    zh_translations = {}
+    en_translations = {}
     
     for question in questions:
         question_id = question.get("id")
         if not question_id:
             continue
         
-        # 使用题目ID作为translationKey
-        translation_key = question_id
-        
-        # 生成翻译结构
-        translation_data = {
-            "question": "",  # 题目的中文翻译（待填充）
-            "options": {}
-        }
-        
-        # 为每个选项生成翻译结构
+        zh_options = {}
+        en_options = {}
         for option in question.get("options", []):
             option_label = option.get("label", "")
             if option_label:
-                translation_data["options"][option_label] = ""  # 选项的中文翻译（待填充）
+                zh_options[option_label] = ""  # 选项的中文翻译（待填充）
+                en_options[option_label] = option.get("content", "")
         
-        translations[translation_key] = translation_data
+        # 使用题目ID作为translationKey
+        zh_translations[question_id] = {
+            "question": "",  # 题目的中文翻译（待填充）
+            "options": zh_options
+        }
+        en_translations[question_id] = {
+            "question": question.get("question", ""),
+            "options": en_options
+        }
     
-    return translations
+    return zh_translations, en_translations
+
+def _print_summary(total: int, translation_count: int):
+    """输出生成统计"""
+    print("\n" + "=" * 60)
+    print("📊 生成统计:")
+    print(f"  总题目数: {total}")
+    print(f"  翻译结构: {translation_count} 个")
+    print(f"  中文翻译文件: {OUTPUT_ZH_FILE}")
+    print(f"  英文翻译文件: {OUTPUT_EN_FILE}")
+    print("\n⚠️  注意: 中文翻译文件中的翻译内容需要手动填充或使用翻译API填充")
+    print("=" * 60)
 
 def main():
     """主函数"""
@@ -53,9 +141,20 @@ def main():
         print(f"❌ 题目文件不存在: {QUESTIONS_FILE}")
         return
     
+    cache_key = _cache_key()
+    cached = _read_cache(cache_key)
+    if cached:
+        total, translation_count = cached
+        print(f"\n♻️  题目数据未变化，使用翻译缓存: {CACHE_DIR}")
+        OUTPUT_ZH_FILE.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(CACHE_DIR / f"{cache_key}.zh.json", OUTPUT_ZH_FILE)
+        shutil.copyfile(CACHE_DIR / f"{cache_key}.en.json", OUTPUT_EN_FILE)
+        print("✓ 中文、英文翻译文件已保存")
+        _print_summary(total, translation_count)
+        return
+    
     print(f"\n📖 读取题目数据: {QUESTIONS_FILE}")
-    with open(QUESTIONS_FILE, "r", encoding="utf-8") as f:
-        questions_data = json.load(f)
+    questions_data = _load_json(QUESTIONS_FILE)
     
     questions = questions_data.get("questions", [])
     total = len(questions)
@@ -67,7 +166,7 @@ def main():
     
     # 生成翻译结构
     print("\n🔨 生成翻译数据结构...")
-    translations = generate_translation_structure(questions)
+    translations, en_translations = build_translations(questions)
     print(f"✓ 生成了 {len(translations)} 个题目的翻译结构")
     
     # 确保输出目录存在
@@ -78,46 +177,19 @@ def main():
     zh_output = {
         "questions": translations
     }
-    with open(OUTPUT_ZH_FILE, "w", encoding="utf-8") as f:
-        json.dump(zh_output, f, indent=2, ensure_ascii=False)
+    _dump_json(OUTPUT_ZH_FILE, zh_output)
     print("✓ 中文翻译文件已保存")
     
     # 生成英文翻译文件（英文题目本身就是英文，所以直接使用原文本）
     print(f"\n💾 生成英文翻译文件: {OUTPUT_EN_FILE}")
-    en_translations = {}
-    for question in questions:
-        question_id = question.get("id")
-        if not question_id:
-            continue
-        
-        en_translation = {
-            "question": question.get("question", ""),
-            "options": {}
-        }
-        
-        for option in question.get("options", []):
-            option_label = option.get("label", "")
-            if option_label:
-                en_translation["options"][option_label] = option.get("content", "")
-        
-        en_translations[question_id] = en_translation
-    
     en_output = {
         "questions": en_translations
     }
-    with open(OUTPUT_EN_FILE, "w", encoding="utf-8") as f:
-        json.dump(en_output, f, indent=2, ensure_ascii=False)
+    _dump_json(OUTPUT_EN_FILE, en_output)
     print("✓ 英文翻译文件已保存")
+    _write_cache(cache_key, total, len(translations))
     
-    # 统计信息
-    print("\n" + "=" * 60)
-    print("📊 生成统计:")
-    print(f"  总题目数: {total}")
-    print(f"  翻译结构: {len(translations)} 个")
-    print(f"  中文翻译文件: {OUTPUT_ZH_FILE}")
-    print(f"  英文翻译文件: {OUTPUT_EN_FILE}")
-    print("\n⚠️  注意: 中文翻译文件中的翻译内容需要手动填充或使用翻译API填充")
-    print("=" * 60)
+    _print_summary(total, len(translations))
 
 if __name__ == "__main__":
     main()
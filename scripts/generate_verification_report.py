@@ -4,15 +4,57 @@
 包括图片重复使用、缺失文件、题目选项一致性等问题
 """
 import json
+import os
 from pathlib import Path
 from typing import Dict, List, Set
 from collections import defaultdict
+from functools import lru_cache
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # 配置
 FINAL_QUESTIONS_FILE = Path(__file__).parent.parent / "web" / "src" / "data" / "questions.json"
 PUBLIC_DIR = Path(__file__).parent.parent / "web" / "public"
 REPORT_FILE = Path(__file__).parent.parent / "verification_report.txt"
 
+@lru_cache(maxsize=None)
+def _public_image_path(img_path: str) -> str:
+    """把题目数据中的图片路径规范为相对web/public的路径（如"images/questions/a.png"）
+    
+    同一图片常被多道题引用，结果按原路径缓存
+    """
+    clean_path = img_path.lstrip("/")
+    if not clean_path.startswith("images/"):
+        clean_path = f"images/{clean_path}"
+    return clean_path
+
+def scan_public_images() -> Set[str]:
+    """用os.scandir遍历一遍web/public/images，收集所有文件相对web/public的路径"""
+    existing = set()
+    stack = [(str(PUBLIC_DIR / "images"), "images")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}"
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel_path))
+                else:
+                    existing.add(rel_path)
+    return existing
+
+def _image_exists(clean_path: str, existing_images: Set[str]) -> bool:
+    """图片是否存在：先查预扫描的集合，未命中（或路径写法不规范）时再stat一次"""
+    return clean_path in existing_images or (PUBLIC_DIR / clean_path).exists()
+
 def generate_report():
     """生成验证报告"""
     print("=" * 60)
@@ -23,195 +65,195 @@ def generate_report():
         print(f"❌ 题目文件不存在: {FINAL_QUESTIONS_FILE}")
         return
     
-    with open(FINAL_QUESTIONS_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    if ORJSON_AVAILABLE:
+        data = orjson.loads(FINAL_QUESTIONS_FILE.read_bytes())
+    else:
+        with open(FINAL_QUESTIONS_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
     
     questions = data.get("questions", [])
     print(f"📊 总题目数: {len(questions)}")
     
+    # 一次扫描图片目录，之后的存在性检查只做集合查找
+    existing_images = scan_public_images()
+    
     # 统计信息
-    image_usage = defaultdict(list)  # 图片路径 -> 使用该图片的题目列表
+    # 图片引用按列存放（SoA）：同一下标对应同一次引用，报告时再按路径分组
+    img_ref_paths = []  # 被引用的图片路径
+    img_ref_qids = []  # 引用该图片的题目ID
+    img_ref_summaries = []  # 题目摘要（选项图片为"选项 X: ..."）
     missing_images = []  # 缺失的图片
     duplicate_image_issues = []  # 图片重复使用的问题
     
+    def record_image(img_path: str, question_id: str, question_summary: str, option_label: str = None):
+        """记录一次图片引用，并检查文件是否存在（option_label非None时表示选项图片）"""
+        img_ref_paths.append(img_path)
+        img_ref_qids.append(question_id)
+        img_ref_summaries.append(question_summary)
+        
+        clean_path = _public_image_path(img_path)
+        if not _image_exists(clean_path, existing_images):
+            missing = {
+                "question_id": question_id,
+                "image_path": img_path,
+                "full_path": str(PUBLIC_DIR / clean_path)
+            }
+            if option_label is not None:
+                missing["option"] = option_label
+            missing_images.append(missing)
+    
     # 检查每个题目
     for question in questions:
         question_id = question.get("id", "")
         
         # 检查题目图片
         question_images = question.get("questionImages", [])
-        for img_path in question_images:
-            if not img_path:
-                continue
-            
-            # 记录使用情况
-            image_usage[img_path].append({
-                "id": question_id,
-                "question": question.get("question", "")[:50] + "..." if len(question.get("question", "")) > 50 else question.get("question", "")
-            })
-            
-            # 检查文件是否存在
-            clean_path = img_path.lstrip("/")
-            if not clean_path.startswith("images/"):
-                clean_path = f"images/{clean_path}"
-            full_path = PUBLIC_DIR / clean_path
-            
-            if not full_path.exists():
-                missing_images.append({
-                    "question_id": question_id,
-                    "image_path": img_path,
-                    "full_path": str(full_path)
-                })
+        if question_images:
+            question_text = question.get("question", "")
+            question_summary = question_text[:50] + "..." if len(question_text) > 50 else question_text
+            for img_path in question_images:
+                if img_path:
+                    record_image(img_path, question_id, question_summary)
         
         # 检查选项图片
         for option in question.get("options", []):
             img_path = option.get("imagePath")
             if img_path:
-                image_usage[img_path].append({
-                    "id": question_id,
-                    "question": f"选项 {option.get('label', '')}: {option.get('content', '')[:30]}"
-                })
-                
-                clean_path = img_path.lstrip("/")
-                if not clean_path.startswith("images/"):
-                    clean_path = f"images/{clean_path}"
-                full_path = PUBLIC_DIR / clean_path
-                
-                if not full_path.exists():
-                    missing_images.append({
-                        "question_id": question_id,
-                        "image_path": img_path,
-                        "full_path": str(full_path),
-                        "option": option.get("label", "")
-                    })
+                label = option.get("label", "")
+                record_image(img_path, question_id, f"选项 {label}: {option.get('content', '')[:30]}", label)
+    
+    # 一次遍历按图片路径分组，得到 图片路径 -> 引用下标列表
+    image_refs = defaultdict(list)
+    for i, img_path in enumerate(img_ref_paths):
+        image_refs[img_path].append(i)
     
     # 找出重复使用的图片
-    for img_path, usages in image_usage.items():
-        if len(usages) > 1:
+    for img_path, indices in image_refs.items():
+        if len(indices) > 1:
             # 检查这些使用是否合理（相同题目文本可能合理）
-            unique_questions = set()
-            for usage in usages:
-                unique_questions.add(usage["question"])
+            unique_questions = {img_ref_summaries[i] for i in indices}
             
             # 如果不同题目使用相同图片，可能有问题
             if len(unique_questions) > 1:
                 duplicate_image_issues.append({
                     "image_path": img_path,
-                    "usage_count": len(usages),
+                    "usage_count": len(indices),
                     "unique_questions": len(unique_questions),
-                    "usages": usages[:5]  # 只保存前5个示例
+                    # 只为前5个示例构造记录
+                    "usages": [{"id": img_ref_qids[i], "question": img_ref_summaries[i]} for i in indices[:5]]
                 })
     
-    # 生成报告
-    report_lines = []
-    report_lines.append("=" * 80)
-    report_lines.append("题目数据验证报告")
-    report_lines.append("=" * 80)
-    report_lines.append(f"\n总题目数: {len(questions)}")
-    report_lines.append(f"总图片引用数: {sum(len(usages) for usages in image_usage.values())}")
-    report_lines.append(f"唯一图片数: {len(image_usage)}")
-    
-    # 缺失图片报告
-    report_lines.append("\n" + "=" * 80)
-    report_lines.append("1. 缺失图片检查")
-    report_lines.append("=" * 80)
-    if missing_images:
-        report_lines.append(f"\n❌ 发现 {len(missing_images)} 个缺失的图片文件:")
-        for missing in missing_images[:20]:
-            report_lines.append(f"  题目ID: {missing['question_id']}")
-            report_lines.append(f"  图片路径: {missing['image_path']}")
-            if 'option' in missing:
-                report_lines.append(f"  选项: {missing['option']}")
-            report_lines.append("")
-        if len(missing_images) > 20:
-            report_lines.append(f"  ... 还有 {len(missing_images) - 20} 个缺失图片")
-    else:
-        report_lines.append("\n✅ 所有图片文件都存在")
-    
-    # 图片重复使用报告
-    report_lines.append("\n" + "=" * 80)
-    report_lines.append("2. 图片重复使用检查")
-    report_lines.append("=" * 80)
-    if duplicate_image_issues:
-        report_lines.append(f"\n⚠️  发现 {len(duplicate_image_issues)} 个图片被多个不同题目使用:")
-        report_lines.append("  (这可能是正常的，如果多个题目确实使用相同的图片)")
-        report_lines.append("  (但也可能是抓取时的bug，导致多个题目使用了错误的图片)\n")
-        
-        for issue in duplicate_image_issues[:20]:
-            report_lines.append(f"图片: {issue['image_path']}")
-            report_lines.append(f"  被 {issue['usage_count']} 个引用使用，涉及 {issue['unique_questions']} 个不同题目")
-            report_lines.append("  使用示例:")
-            for usage in issue['usages']:
-                report_lines.append(f"    - {usage['id']}: {usage['question']}")
-            report_lines.append("")
-        
-        if len(duplicate_image_issues) > 20:
-            report_lines.append(f"  ... 还有 {len(duplicate_image_issues) - 20} 个重复图片问题")
-        
-        # 特别关注那些被大量题目使用的图片
-        high_usage = [issue for issue in duplicate_image_issues if issue['usage_count'] > 10]
-        if high_usage:
-            report_lines.append(f"\n⚠️  特别关注: {len(high_usage)} 个图片被超过10个题目使用:")
-            for issue in high_usage[:10]:
-                report_lines.append(f"  - {issue['image_path']}: {issue['usage_count']} 个题目")
-    else:
-        report_lines.append("\n✅ 没有发现异常的图片重复使用")
-    
-    # 题目完整性检查
-    report_lines.append("\n" + "=" * 80)
-    report_lines.append("3. 题目完整性检查")
-    report_lines.append("=" * 80)
-    
-    incomplete_questions = []
-    for question in questions:
-        issues = []
-        question_id = question.get("id", "")
+    # 生成报告：逐行直接写入文件，不在内存中累积整份报告
+    with open(REPORT_FILE, "w", encoding="utf-8", buffering=1 << 20) as f:
+        def emit(line: str):
+            f.write(line)
+            f.write("\n")
         
-        if not question.get("question"):
-            issues.append("缺少题目文本")
-        if not question.get("options") or len(question["options"]) < 2:
-            issues.append(f"选项数量不足: {len(question.get('options', []))}")
-        if not question.get("correctAnswer"):
-            issues.append("缺少正确答案")
-        
-        # 检查正确答案是否在选项中
-        correct_answer = question.get("correctAnswer", "").strip().upper()
-        option_labels = {opt.get("label", "").strip().upper() for opt in question.get("options", [])}
-        if correct_answer and correct_answer not in option_labels:
-            issues.append(f"正确答案 '{correct_answer}' 不在选项中")
-        
-        if issues:
-            incomplete_questions.append({
-                "id": question_id,
-                "issues": issues
-            })
-    
-    if incomplete_questions:
-        report_lines.append(f"\n❌ 发现 {len(incomplete_questions)} 个题目存在问题:")
-        for q in incomplete_questions[:20]:
-            report_lines.append(f"  题目ID: {q['id']}")
-            for issue in q['issues']:
-                report_lines.append(f"    - {issue}")
-            report_lines.append("")
-        if len(incomplete_questions) > 20:
-            report_lines.append(f"  ... 还有 {len(incomplete_questions) - 20} 个题目存在问题")
-    else:
-        report_lines.append("\n✅ 所有题目数据完整")
-    
-    # 统计摘要
-    report_lines.append("\n" + "=" * 80)
-    report_lines.append("统计摘要")
-    report_lines.append("=" * 80)
-    report_lines.append(f"总题目数: {len(questions)}")
-    report_lines.append(f"缺失图片: {len(missing_images)}")
-    report_lines.append(f"图片重复使用问题: {len(duplicate_image_issues)}")
-    report_lines.append(f"不完整题目: {len(incomplete_questions)}")
-    report_lines.append("=" * 80)
-    
-    # 保存报告
-    report_content = "\n".join(report_lines)
-    with open(REPORT_FILE, "w", encoding="utf-8") as f:
-        f.write(report_content)
+        emit("=" * 80)
+        emit("题目数据验证报告")
+        emit("=" * 80)
+        emit(f"\n总题目数: {len(questions)}")
+        emit(f"总图片引用数: {len(img_ref_paths)}")
+        emit(f"唯一图片数: {len(image_refs)}")
+        
+        # 缺失图片报告
+        emit("\n" + "=" * 80)
+        emit("1. 缺失图片检查")
+        emit("=" * 80)
+        if missing_images:
+            emit(f"\n❌ 发现 {len(missing_images)} 个缺失的图片文件:")
+            for missing in missing_images[:20]:
+                emit(f"  题目ID: {missing['question_id']}")
+                emit(f"  图片路径: {missing['image_path']}")
+                if 'option' in missing:
+                    emit(f"  选项: {missing['option']}")
+                emit("")
+            if len(missing_images) > 20:
+                emit(f"  ... 还有 {len(missing_images) - 20} 个缺失图片")
+        else:
+            emit("\n✅ 所有图片文件都存在")
+        
+        # 图片重复使用报告
+        emit("\n" + "=" * 80)
+        emit("2. 图片重复使用检查")
+        emit("=" * 80)
+        if duplicate_image_issues:
+            emit(f"\n⚠️  发现 {len(duplicate_image_issues)} 个图片被多个不同题目使用:")
+            emit("  (这可能是正常的，如果多个题目确实使用相同的图片)")
+            emit("  (但也可能是抓取时的bug，导致多个题目使用了错误的图片)\n")
+        
+            for issue in duplicate_image_issues[:20]:
+                emit(f"图片: {issue['image_path']}")
+                emit(f"  被 {issue['usage_count']} 个引用使用，涉及 {issue['unique_questions']} 个不同题目")
+                emit("  使用示例:")
+                for usage in issue['usages']:
+                    emit(f"    - {usage['id']}: {usage['question']}")
+                emit("")
+        
+            if len(duplicate_image_issues) > 20:
+                emit(f"  ... 还有 {len(duplicate_image_issues) - 20} 个重复图片问题")
+        
+            # 特别关注那些被大量题目使用的图片
+            high_usage = [issue for issue in duplicate_image_issues if issue['usage_count'] > 10]
+            if high_usage:
+                emit(f"\n⚠️  特别关注: {len(high_usage)} 个图片被超过10个题目使用:")
+                for issue in high_usage[:10]:
+                    emit(f"  - {issue['image_path']}: {issue['usage_count']} 个题目")
+        else:
+            emit("\n✅ 没有发现异常的图片重复使用")
+        
+        # 题目完整性检查
+        emit("\n" + "=" * 80)
+        emit("3. 题目完整性检查")
+        emit("=" * 80)
+        
+        incomplete_questions = []
+        for question in questions:
+            issues = []
+            question_id = question.get("id", "")
+        
+            if not question.get("question"):
+                issues.append("缺少题目文本")
+            if not question.get("options") or len(question["options"]) < 2:
+                issues.append(f"选项数量不足: {len(question.get('options', []))}")
+            if not question.get("correctAnswer"):
+                issues.append("缺少正确答案")
+        
+            # 检查正确答案是否在选项中
+            # 没有正确答案时不构造选项标签集合（correctAnswer可能为null）
+            correct_answer = (question.get("correctAnswer") or "").strip().upper()
+            if correct_answer:
+                option_labels = {opt.get("label", "").strip().upper() for opt in question.get("options", [])}
+                if correct_answer not in option_labels:
+                    issues.append(f"正确答案 '{correct_answer}' 不在选项中")
+        
+            if issues:
+                incomplete_questions.append({
+                    "id": question_id,
+                    "issues": issues
+                })
+        
+        if incomplete_questions:
+            emit(f"\n❌ 发现 {len(incomplete_questions)} 个题目存在问题:")
+            for q in incomplete_questions[:20]:
+                emit(f"  题目ID: {q['id']}")
+                for issue in q['issues']:
+                    emit(f"    - {issue}")
+                emit("")
+            if len(incomplete_questions) > 20:
+                emit(f"  ... 还有 {len(incomplete_questions) - 20} 个题目存在问题")
+        else:
+            emit("\n✅ 所有题目数据完整")
+        
+        # 统计摘要
+        emit("\n" + "=" * 80)
+        emit("统计摘要")
+        emit("=" * 80)
+        emit(f"总题目数: {len(questions)}")
+        emit(f"缺失图片: {len(missing_images)}")
+        emit(f"图片重复使用问题: {len(duplicate_image_issues)}")
+        emit(f"不完整题目: {len(incomplete_questions)}")
+        emit("=" * 80)
     
     print(f"\n✅ 报告已保存到: {REPORT_FILE}")
     print("\n报告摘要:")
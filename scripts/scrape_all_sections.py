@@ -99,15 +99,21 @@ def main():
         if scraper.use_selenium and questions_by_url:
             print(f"\n步骤2: 通过点击选项检测Section {section}的正确答案...")
             
+            # 按ID索引section_questions，更新答案时直接查表，不必对每道题扫描整个列表
+            section_by_id = {}
+            for sq in section_questions:
+                section_by_id.setdefault(sq['id'], []).append(sq)
+            
             for set_url, questions in questions_by_url.items():
                 print(f"\n处理 {set_url}...")
                 updated_questions = scraper.detect_answers_for_questions(questions, set_url)
-                # 更新section_questions中的答案
-                for sq in section_questions:
-                    for uq in updated_questions:
-                        if sq['id'] == uq['id']:
-                            sq['correctAnswer'] = uq.get('correctAnswer')
-                            break
+                # 更新section_questions中的答案（ID重复时以updated_questions中第一个为准）
+                answers = {}
+                for uq in updated_questions:
+                    answers.setdefault(uq['id'], uq.get('correctAnswer'))
+                for question_id, answer in answers.items():
+                    for sq in section_by_id.get(question_id, ()):
+                        sq['correctAnswer'] = answer
                 detected_count = sum(1 for q in updated_questions if q.get('correctAnswer'))
                 print(f"完成，检测到答案的题目: {detected_count}/{len(updated_questions)}")
         